@@ -0,0 +1,101 @@
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+# pyarrow is only needed for the columnar export, so it is imported lazily
+FORMATS = {"arrow": ".arrow", "parquet": ".parquet"}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Columnar export requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def column_array(pa, values: List[Any]):
+    """
+    Build an Arrow array for one column.
+
+    Numeric vectors that have the same length in every row (translation,
+    size, rotation, ...) become fixed_size_list<float64> so they can be read
+    back as a single contiguous (rows, n) buffer. Anything else is left to
+    Arrow's type inference.
+    """
+    if values and all(isinstance(v, list) for v in values):
+        sizes = {len(v) for v in values}
+        if len(sizes) == 1 and sizes != {0} and all(_is_number(x) for v in values for x in v):
+            flat = pa.array([float(x) for v in values for x in v], type=pa.float64())
+            return pa.FixedSizeListArray.from_arrays(flat, sizes.pop())
+    return pa.array(values)
+
+
+def table_to_arrow(pa, rows: List[Dict[str, Any]]):
+    """Convert a list of row dicts into an Arrow table, keeping the key order of the rows."""
+    names = []
+    for row in rows:
+        for key in row:
+            if key not in names:
+                names.append(key)
+    return pa.table({name: column_array(pa, [row.get(name) for row in rows]) for name in names})
+
+
+def export_columnar(output_dir: Path, tables: Dict[str, List[Dict[str, Any]]], fmt: str = "arrow"):
+    """
+    Write every table as a columnar file next to the JSON output.
+
+    Args:
+        output_dir: Directory for the columnar files
+        tables: Table name -> rows, as built in main()
+        fmt: "arrow" for uncompressed Arrow IPC files (memory-mappable with
+            zero-copy reads) or "parquet"
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown columnar format: {fmt} (expected one of {list(FORMATS)})")
+
+    pa = _import_pyarrow()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    for name, rows in tables.items():
+        if not rows:
+            print(f"⚠ Skipping empty table: {name}")
+            continue
+
+        table = table_to_arrow(pa, rows)
+        output_file = output_dir / f"{name}{FORMATS[fmt]}"
+        if fmt == "arrow":
+            with pa.OSFile(str(output_file), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        else:
+            pa.parquet.write_table(table, str(output_file))
+        print(f"✅ {output_file.name} created with {table.num_rows} rows")
+
+
+def read_columnar(path: Path, columns: Optional[List[str]] = None):
+    """
+    Read a columnar table, projecting only the requested columns.
+
+    Arrow IPC files are memory-mapped so the returned columns reference the
+    file without copying; Parquet files are read with memory_map=True.
+
+    Args:
+        path: Path of a file written by export_columnar
+        columns: Column names to read (all columns if None)
+
+    Returns:
+        A pyarrow.Table
+    """
+    pa = _import_pyarrow()
+    path = Path(path)
+
+    if path.suffix == FORMATS["parquet"]:
+        return pa.parquet.read_table(str(path), columns=columns, memory_map=True)
+
+    table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    return table.select(columns) if columns is not None else table
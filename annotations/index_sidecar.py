@@ -0,0 +1,181 @@
+import json
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+import numpy as np
+
+# (index name, parent table, child table, foreign key on the child rows)
+INDEX_SPECS = [
+    ("scene_to_sample", "scene", "sample", "scene_token"),
+    ("sample_to_annotation", "sample", "sample_annotation", "sample_token"),
+    ("sample_to_sample_data", "sample", "sample_data", "sample_token"),
+    ("instance_to_annotation", "instance", "sample_annotation", "instance_token"),
+    ("ego_pose_to_sample_data", "ego_pose", "sample_data", "ego_pose_token"),
+]
+
+
+def build_csr(
+    parents: List[Dict[str, Any]],
+    children: List[Dict[str, Any]],
+    key: str
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Build a CSR reverse index from child rows to their parent rows.
+
+    Args:
+        parents: Rows of the parent table (position = row index)
+        children: Rows of the child table
+        key: Field on the child rows holding the parent token
+
+    Returns:
+        (offsets, rows, unresolved) where the children of parent p are
+        rows[offsets[p]:offsets[p + 1]] and unresolved counts child rows whose
+        foreign key does not match any parent token
+    """
+    position = {row["token"]: i for i, row in enumerate(parents)}
+    parent_idx = np.fromiter(
+        (position.get(row.get(key), -1) for row in children),
+        dtype=np.int64,
+        count=len(children)
+    )
+
+    resolved = parent_idx >= 0
+    child_idx = np.flatnonzero(resolved)
+    parent_idx = parent_idx[resolved]
+
+    # Stable sort keeps the children of each parent in table order
+    order = np.argsort(parent_idx, kind="stable")
+    rows = child_idx[order].astype(np.int64)
+
+    counts = np.bincount(parent_idx, minlength=len(parents))
+    offsets = np.zeros(len(parents) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    return offsets, rows, int(len(children) - len(child_idx))
+
+
+def token_column(rows: List[Dict[str, Any]]) -> np.ndarray:
+    """Pack the token column of a table into a fixed-width bytes array."""
+    return np.array([row["token"].encode("ascii") for row in rows], dtype=bytes)
+
+
+def generate_index_sidecar(output_dir: Path, tables: Dict[str, List[Dict[str, Any]]]):
+    """
+    Write the reverse-index sidecar next to the JSON tables.
+
+    Every index is stored as two .npy files (offsets and rows) and every table
+    referenced by an index gets a token column, so loaders can np.load them
+    with mmap_mode="r" instead of scanning the JSON tables.
+
+    Args:
+        output_dir: Directory for the sidecar files
+        tables: Table name -> list of rows, as written by main()
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = {"tables": {}, "indexes": {}}
+
+    for name, parent, child, key in INDEX_SPECS:
+        if parent not in tables or child not in tables:
+            continue
+
+        for table in (parent, child):
+            if table not in manifest["tables"]:
+                np.save(output_dir / f"{table}_tokens.npy", token_column(tables[table]))
+                manifest["tables"][table] = {
+                    "tokens": f"{table}_tokens.npy",
+                    "rows": len(tables[table])
+                }
+
+        offsets, rows, unresolved = build_csr(tables[parent], tables[child], key)
+        np.save(output_dir / f"{name}_offsets.npy", offsets)
+        np.save(output_dir / f"{name}_rows.npy", rows)
+
+        manifest["indexes"][name] = {
+            "parent": parent,
+            "child": child,
+            "key": key,
+            "offsets": f"{name}_offsets.npy",
+            "rows": f"{name}_rows.npy",
+            "unresolved": unresolved
+        }
+        if unresolved:
+            print(f"⚠ {name}: {unresolved} {child} rows reference an unknown {parent}")
+
+    with open(output_dir / "index.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"✅ Index sidecar created at {output_dir}")
+
+
+def append_index_sidecar(output_dir: Path, tables: Dict[str, List[Dict[str, Any]]]):
+    """
+    Extend an existing index sidecar with rows appended to the tables.
+
+    New rows are assumed to come after the existing rows of every table, and
+    new child rows only reference new parent rows (true for whole scenes
+    appended by main()), so each index is extended by concatenating shifted
+    CSR arrays without touching the existing rows.
+
+    Args:
+        output_dir: Directory written by generate_index_sidecar
+        tables: Table name -> rows appended in this run
+    """
+    manifest_path = output_dir / "index.json"
+    if not manifest_path.exists():
+        print(f"⚠ No index sidecar at {output_dir}, skipping index update")
+        return
+
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+
+    # Row counts before this append; child positions are shifted by these
+    old_rows = {table: entry["rows"] for table, entry in manifest["tables"].items()}
+
+    for name, entry in manifest["indexes"].items():
+        parent, child = entry["parent"], entry["child"]
+        if parent not in tables or child not in tables:
+            continue
+
+        offsets, rows, unresolved = build_csr(tables[parent], tables[child], entry["key"])
+        old_offsets = np.load(output_dir / entry["offsets"])
+        old_index_rows = np.load(output_dir / entry["rows"])
+
+        np.save(output_dir / entry["offsets"], np.concatenate([old_offsets, old_offsets[-1] + offsets[1:]]))
+        np.save(output_dir / entry["rows"], np.concatenate([old_index_rows, rows + old_rows[child]]))
+
+        entry["unresolved"] += unresolved
+        if unresolved:
+            print(f"⚠ {name}: {unresolved} appended {child} rows reference an unknown {parent}")
+
+    for table, entry in manifest["tables"].items():
+        if table not in tables:
+            continue
+        old_tokens = np.load(output_dir / entry["tokens"])
+        np.save(output_dir / entry["tokens"], np.concatenate([old_tokens, token_column(tables[table])]))
+        entry["rows"] += len(tables[table])
+
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"✅ Index sidecar extended at {output_dir}")
+
+
+def load_index(index_dir: Path, name: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Memory-map the (offsets, rows) arrays of one reverse index.
+
+    Args:
+        index_dir: Directory written by generate_index_sidecar
+        name: Index name, e.g. "sample_to_annotation"
+
+    Returns:
+        (offsets, rows) as read-only memory-mapped arrays
+    """
+    with open(index_dir / "index.json", "r") as f:
+        entry = json.load(f)["indexes"][name]
+    offsets = np.load(index_dir / entry["offsets"], mmap_mode="r")
+    rows = np.load(index_dir / entry["rows"], mmap_mode="r")
+    return offsets, rows
+
+
+def children_of(offsets: np.ndarray, rows: np.ndarray, parent_row: int) -> np.ndarray:
+    """Return the child row positions of one parent row."""
+    return rows[offsets[parent_row]:offsets[parent_row + 1]]
@@ -1,8 +1,14 @@
 import os
+import sys
 import json
+import argparse
 from pathlib import Path
 from token_manager import TokenManager
 
+# Shared helpers used by both the annotation and CAN pipelines
+sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+from scene_timing import scene_timestamps, frame_indices
+
 # Import all generators
 from sensor import generate_sensor_json
 from calibrated_sensor import generate_calibrated_sensor_json
@@ -17,10 +23,21 @@ from sample import generate_sample_json
 from sample_data import generate_sample_data_json
 from instance import generate_instance_json
 from sample_annotation import generate_sample_annotation_json
+from index_sidecar import generate_index_sidecar, append_index_sidecar
+from validate import validate_tables, print_report
+from shards import write_sharded_output, append_sharded_output, append_json_rows
+from columnar import export_columnar
+
+
+# Tables that do not depend on the converted scenes; append mode keeps them as they are
+STATIC_TABLES = ["attribute", "calibrated_sensor", "category", "log", "map", "sensor", "visibility"]
 
 
-def process_scene(scene_number, base_data_dir, tokens):
-    """Process a single scene with the given scene number and return its data"""
+def process_scene(scene_number, base_data_dir, tokens, cache_dir=None):
+    """
+    Process a single scene with the given scene number and return its data.
+    The scene's timing index is cached in cache_dir (None disables the cache).
+    """
     print(f"\n🔷 Processing scene {scene_number}")
     
     # Create scene paths
@@ -49,12 +66,25 @@ def process_scene(scene_number, base_data_dir, tokens):
     num_frames = len(ego_pose_data)
     print(f"📌 Scene {scene_number}: {num_frames} frames detected")
     
+    # Frame clock shared with the CAN pipeline
+    timestamps = scene_timestamps(scene_data_dir, cache_dir)
+    if len(timestamps) != num_frames:
+        print(f"⚠ Warning: timing index has {len(timestamps)} frames, using ego pose timestamps")
+        timestamps = None
+    else:
+        # Annotations without a frame index are placed on their nearest frame
+        untimed = [ann for ann in annotation_data if "frame_idx" not in ann and "timestamp_ns" in ann]
+        if untimed:
+            frames = frame_indices(timestamps, [ann["timestamp_ns"] for ann in untimed])
+            for ann, frame in zip(untimed, frames.tolist()):
+                ann["frame_idx"] = frame
+    
     # Generate scene data without writing to files
     scene_data = {
         "scene": generate_scene_json(None, num_frames, tokens, scene_number),
         "ego_pose": generate_ego_pose_json(None, ego_pose_data, tokens, scene_number),
-        "sample": generate_sample_json(None, ego_pose_data, tokens, scene_number),
-        "sample_data": generate_sample_data_json(None, ego_pose_data, tokens, scene_number),
+        "sample": generate_sample_json(None, ego_pose_data, tokens, scene_number, timestamps),
+        "sample_data": generate_sample_data_json(None, ego_pose_data, tokens, scene_number, timestamps),
         "instance": generate_instance_json(None, annotation_data, tokens, scene_number),
         "sample_annotation": generate_sample_annotation_json(None, annotation_data, tokens, scene_number)
     }
@@ -92,28 +122,18 @@ def combine_scene_data(scene_info):
     return combined
 
 
-def main():
-    # Base paths
-    output_root = Path(r"C:\Users\mitvi\Downloads\argov2_00000\output")
-    annotation_path = output_root / "annotation"
-    base_data_dir = r"C:\Users\mitvi\Downloads\argov2_00000\argov2_00000"
-    
-    # Ensure output directory exists
-    annotation_path.mkdir(parents=True, exist_ok=True)
-    
-    # Initialize token manager
-    tokens = TokenManager()
-    
-    # List of scene numbers to process
-    scene_numbers = [1, 2, 3, 4, 5]
-    
-    # Process each scene
-    scene_info = []
-    for scene_num in scene_numbers:
-        scene_data = process_scene(scene_num, base_data_dir, tokens)
-        if scene_data:
-            scene_info.append(scene_data)
+def write_tables(annotation_path, tokens, scene_info, layout="monolithic", columnar=None, append=False):
+    """
+    Build every table from converted scenes and write them with their sidecars.
     
+    Args:
+        annotation_path: <output_root>/annotation
+        tokens: TokenManager holding the tokens of all scenes
+        scene_info: process_scene results, in scene order
+        layout: "monolithic" or "sharded" (see main)
+        columnar: Optional "arrow" or "parquet" export
+        append: Append the scenes to an existing output instead of writing it
+    """
     # Combine all scene data
     combined_data = combine_scene_data(scene_info)
     
@@ -139,19 +159,134 @@ def main():
         'visibility': generate_visibility_json(None, return_data=True)
     }
     
-    # Save each data type to a separate JSON file
-    for data_type, data in data_to_save.items():
-        output_file = annotation_path / f"{data_type}.json"
-        with open(output_file, 'w') as f:
-            json.dump(data, f, indent=2)
-        print(f"✅ {data_type}.json created at {output_file}")
+    # Check token references before anything is written
+    print_report(validate_tables(data_to_save))
+    
+    if append:
+        # Static tables already exist with the same tokens; only add the new rows
+        new_data = {k: v for k, v in data_to_save.items() if k not in STATIC_TABLES}
+        if layout == "sharded":
+            append_sharded_output(annotation_path, new_data, scene_info)
+        else:
+            for data_type, data in new_data.items():
+                append_json_rows(annotation_path / f"{data_type}.json", data)
+                print(f"✅ {len(data)} rows appended to {data_type}.json")
+        append_index_sidecar(annotation_path / "index", new_data)
+    elif layout == "sharded":
+        # Per-frame tables go to per-scene shards, the rest stays monolithic
+        write_sharded_output(annotation_path, data_to_save, scene_info)
+    else:
+        # Save each data type to a separate JSON file
+        for data_type, data in data_to_save.items():
+            output_file = annotation_path / f"{data_type}.json"
+            with open(output_file, 'w') as f:
+                json.dump(data, f, indent=2)
+            print(f"✅ {data_type}.json created at {output_file}")
+    
+    # Precompute reverse indexes for loaders
+    if not append:
+        generate_index_sidecar(annotation_path / "index", data_to_save)
     
-    # Save token map
+    # Columnar copies for column-projecting readers
+    if columnar:
+        export_columnar(annotation_path / "columnar", data_to_save, columnar)
+    
+    # Save token map, plus its (kind, scene) index for per-scene lookups
     tokens.save(annotation_path / "tokens_map.json")
+    tokens.save_index(annotation_path / "tokens_map.sqlite")
+
+
+def main(
+    output_root=Path(r"C:\Users\mitvi\Downloads\argov2_00000\output"),
+    base_data_dir=r"C:\Users\mitvi\Downloads\argov2_00000\argov2_00000",
+    scene_numbers=(1, 2, 3, 4, 5),
+    layout="monolithic",
+    columnar=None,
+    append=False
+):
+    """
+    Convert the given scenes and write the nuScenes annotation tables.
+    
+    Args:
+        output_root: Output root; tables go to <output_root>/annotation
+        base_data_dir: Folder containing argov2_1 ... argov2_N
+        scene_numbers: Scene numbers to convert
+        layout: "monolithic" for one file per table, "sharded" to split the
+            per-frame tables into per-scene shards with a manifest
+        columnar: Optional "arrow" or "parquet" to also export every table
+            to <output_root>/annotation/columnar
+        append: Extend an existing conversion in place: reuse its
+            tokens_map.json, convert only scenes it does not contain yet and
+            append their rows to the existing tables (or shards)
+    """
+    annotation_path = Path(output_root) / "annotation"
+    
+    # Ensure output directory exists
+    annotation_path.mkdir(parents=True, exist_ok=True)
+    
+    # Initialize token manager
+    tokens = TokenManager()
+    
+    if append:
+        if columnar:
+            raise ValueError("Columnar export cannot be combined with append mode")
+        
+        token_map_file = annotation_path / "tokens_map.json"
+        if not token_map_file.exists():
+            raise FileNotFoundError(f"Append mode needs an existing conversion, but {token_map_file} is missing")
+        tokens.load(token_map_file)
+        
+        # Only convert scenes that are not in the existing output yet
+        existing = [n for n in scene_numbers if tokens.get(f"scene_{n}", create_if_missing=False)]
+        if existing:
+            print(f"⚠ Scenes {existing} are already converted, skipping them")
+        scene_numbers = [n for n in scene_numbers if n not in existing]
+    
+    # Process each scene
+    scene_info = []
+    for scene_num in scene_numbers:
+        scene_data = process_scene(scene_num, base_data_dir, tokens, Path(output_root) / "cache")
+        if scene_data:
+            scene_info.append(scene_data)
+    
+    write_tables(annotation_path, tokens, scene_info, layout, columnar, append)
     
     print("\n🎯 All data saved in separate JSON files!")
     print(f"Processed {len(scene_info)} scenes out of {len(scene_numbers)}.")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Convert ArgoV2 scenes to nuScenes annotation tables")
+    parser.add_argument(
+        "--output_root",
+        type=str,
+        default=r"C:\Users\mitvi\Downloads\argov2_00000\output",
+        help="Output root; tables are written to <output_root>/annotation"
+    )
+    parser.add_argument(
+        "--base_data_dir",
+        type=str,
+        default=r"C:\Users\mitvi\Downloads\argov2_00000\argov2_00000",
+        help="Base folder containing argov2_1 ... argov2_N"
+    )
+    parser.add_argument("--scenes", type=int, nargs="+", default=[1, 2, 3, 4, 5], help="Scene numbers to convert")
+    parser.add_argument(
+        "--layout",
+        choices=["monolithic", "sharded"],
+        default="monolithic",
+        help="Write one file per table, or shard the per-frame tables by scene"
+    )
+    parser.add_argument(
+        "--columnar",
+        choices=["arrow", "parquet"],
+        default=None,
+        help="Also export every table as an Arrow IPC or Parquet file"
+    )
+    parser.add_argument(
+        "--append",
+        action="store_true",
+        help="Add new scenes to an existing output instead of regenerating it"
+    )
+    args = parser.parse_args()
+    
+    main(Path(args.output_root), args.base_data_dir, args.scenes, args.layout, args.columnar, args.append)
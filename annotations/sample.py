@@ -7,7 +7,8 @@ def generate_sample_json(
     output_path: Path,
     ego_pose_data: List[Dict[str, Any]],
     tokens: TokenManager,
-    scene_number: int
+    scene_number: int,
+    timestamps=None
 ):
     """
     Generate sample.json for a specific scene.
@@ -17,13 +18,15 @@ def generate_sample_json(
         ego_pose_data: List of ego pose dictionaries
         tokens: TokenManager instance
         scene_number: Scene number for token generation
+        timestamps: Optional per-frame timestamps from the scene timing
+            index; the ego pose timestamps are used when not given
     """
     samples = []
     num_frames = len(ego_pose_data)
     scene_token = tokens.get_or_create_scene_token(scene_number)
 
     for i, pose in enumerate(ego_pose_data):
-        timestamp = pose.get("timestamp_ns", 0)
+        timestamp = int(timestamps[i]) if timestamps is not None else pose.get("timestamp_ns", 0)
         samples.append({
             "token": tokens.get_or_create_sample_token(scene_number, i),
             "timestamp": timestamp,
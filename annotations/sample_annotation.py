@@ -41,7 +41,7 @@ def generate_sample_annotation_json(
         
         # Instance token from track_uuid if available
         track_uuid = ann.get("track_uuid", "")
-        instance_token = tokens.get(f"inst_{track_uuid}") if track_uuid else tokens.get("inst_default")
+        instance_token = tokens.get(f"inst_{scene_number}_{track_uuid}") if track_uuid else tokens.get(f"inst_{scene_number}_default")
         
         # Category token
         category_name = ann.get("category", "")
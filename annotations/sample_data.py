@@ -1,4 +1,4 @@
-def generate_sample_data_json(path, ego_pose_data, tokens, scene_number=1):
+def generate_sample_data_json(path, ego_pose_data, tokens, scene_number=1, timestamps=None):
     """
     Generate sample data JSON for a specific scene
     
@@ -7,16 +7,16 @@ def generate_sample_data_json(path, ego_pose_data, tokens, scene_number=1):
         ego_pose_data: List of ego pose data
         tokens: Dictionary containing token information
         scene_number: Scene number (1-5) for ArgoV2 scenes
+        timestamps: Optional per-frame timestamps from the scene timing index
         
     Returns:
         List of sample data entries
     """
     entries = []
     num_frames = len(ego_pose_data)
-    scene_prefix = f"scene_{scene_number-1}_"  # scene_0_, scene_1_, etc.
 
     for i, pose in enumerate(ego_pose_data):
-        timestamp = pose.get("timestamp_ns", 0)
+        timestamp = int(timestamps[i]) if timestamps is not None else pose.get("timestamp_ns", 0)
         frame_number = i  # You might want to adjust this based on your timestamp
         
         for sensor_name in [
@@ -32,8 +32,8 @@ def generate_sample_data_json(path, ego_pose_data, tokens, scene_number=1):
             # Create entry with scene-specific tokens and filenames
             entries.append({
                 "token": tokens.get(f"sd_{sensor_name}_{scene_number-1}_{i}"),
-                "sample_token": tokens.get(f"{scene_prefix}sample_{i}"),
-                "ego_pose_token": tokens.get(f"{scene_prefix}ego_{i}"),
+                "sample_token": tokens.get_or_create_sample_token(scene_number, i),
+                "ego_pose_token": tokens.get_or_create_ego_pose_token(scene_number, i),
                 "calibrated_sensor_token": tokens.get(f"calib_{sensor_name}"),
                 "filename": f"samples/{sensor_name}/{scene_number}_{frame_number:08d}.{file_extension}",
                 "fileformat": file_extension,
@@ -30,7 +30,7 @@ def generate_scene_json(
         scene_token = tokens.get_or_create_scene_token(scene_idx)
         first_sample_token = tokens.get_or_create_sample_token(scene_idx, 0)
         last_sample_token = tokens.get_or_create_sample_token(scene_idx, num_frames - 1)
-        log_token = tokens.get_or_create_log_token(scene_idx)
+        log_token = tokens.get("log")  # Single log shared with log.json
         
         scene_data = {
             "token": scene_token,
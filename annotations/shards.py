@@ -0,0 +1,227 @@
+import json
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Optional
+
+# Per-frame tables that are split into one file per scene
+SHARDED_TABLES = ["ego_pose", "sample", "sample_data", "sample_annotation"]
+
+MANIFEST_NAME = "manifest.json"
+
+
+def shard_name(scene_number: int) -> str:
+    return f"scene-{scene_number:04d}"
+
+
+def write_json_rows(path: Path, rows: Iterable[Dict[str, Any]]):
+    """
+    Write rows as a JSON array one row at a time.
+
+    The output is byte-identical to json.dump(list(rows), f, indent=2) but
+    never needs the whole list in memory.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        first = True
+        for row in rows:
+            f.write("[\n  " if first else ",\n  ")
+            f.write(json.dumps(row, indent=2).replace("\n", "\n  "))
+            first = False
+        f.write("[]" if first else "\n]")
+
+
+def append_json_rows(path: Path, rows: Iterable[Dict[str, Any]]):
+    """
+    Append rows to a JSON array written by write_json_rows (or json.dump with
+    indent=2) without reading or rewriting the existing rows.
+
+    Only the closing bracket at the end of the file is replaced, so the cost
+    is proportional to the number of appended rows.
+    """
+    if not path.exists():
+        write_json_rows(path, rows)
+        return
+
+    with open(path, "r+b") as f:
+        end = f.seek(0, 2)
+        tail_start = max(0, end - 4096)
+        f.seek(tail_start)
+        tail = f.read().rstrip()
+        if not tail.endswith(b"]"):
+            raise ValueError(f"{path} does not end with a JSON array")
+
+        body = tail[:-1].rstrip()
+        empty = body.endswith(b"[")
+        f.seek(tail_start + len(body))
+        f.truncate()
+
+        wrote = False
+        for row in rows:
+            sep = "\n  " if empty and not wrote else ",\n  "
+            f.write((sep + json.dumps(row, indent=2).replace("\n", "\n  ")).encode())
+            wrote = True
+        f.write(b"]" if empty and not wrote else b"\n]")
+
+
+def _add_shards(
+    output_dir: Path,
+    manifest: Dict[str, Any],
+    scene_info: List[Dict[str, Any]]
+) -> List[tuple]:
+    """Register the scenes' shards in the manifest and return the (path, rows) write jobs."""
+    jobs = []
+    for table in SHARDED_TABLES:
+        entries = manifest["tables"].setdefault(table, [])
+        row_start = entries[-1]["row_end"] if entries else 0
+        for scene in scene_info:
+            rows = scene["scene_data"][table]
+            rel_path = Path("shards") / shard_name(scene["scene_number"]) / f"{table}.json"
+            entries.append({
+                "scene_number": scene["scene_number"],
+                "path": rel_path.as_posix(),
+                "rows": len(rows),
+                "row_start": row_start,
+                "row_end": row_start + len(rows),
+                "first_token": rows[0]["token"] if rows else None,
+                "last_token": rows[-1]["token"] if rows else None
+            })
+            row_start += len(rows)
+            jobs.append((output_dir / rel_path, rows))
+    return jobs
+
+
+def write_sharded_output(
+    output_dir: Path,
+    tables: Dict[str, List[Dict[str, Any]]],
+    scene_info: List[Dict[str, Any]],
+    workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Write the converted tables with the per-frame tables sharded by scene.
+
+    Tables in SHARDED_TABLES go to shards/scene-XXXX/<table>.json, everything
+    else is written monolithically as usual. All files are written
+    concurrently and a manifest describing the shards is saved last.
+
+    Args:
+        output_dir: Annotation output directory
+        tables: Table name -> rows, as built in main()
+        scene_info: Per-scene results from process_scene
+        workers: Number of writer threads
+
+    Returns:
+        The manifest dictionary
+    """
+    manifest = {"layout": "sharded", "tables": {table: [] for table in SHARDED_TABLES}}
+    jobs = _add_shards(output_dir, manifest, scene_info)
+
+    for table, rows in tables.items():
+        if table not in SHARDED_TABLES:
+            jobs.append((output_dir / f"{table}.json", rows))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda job: write_json_rows(*job), jobs))
+
+    with open(output_dir / MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"✅ Sharded output written to {output_dir} ({len(scene_info)} scene shards)")
+
+    return manifest
+
+
+def append_sharded_output(
+    output_dir: Path,
+    tables: Dict[str, List[Dict[str, Any]]],
+    scene_info: List[Dict[str, Any]],
+    workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Add new scenes to an existing sharded output.
+
+    New scenes get their own shards, the manifest is extended after the
+    existing entries and the monolithic tables in `tables` are appended in
+    place with append_json_rows.
+
+    Args:
+        output_dir: Existing sharded annotation output directory
+        tables: Table name -> new rows to append
+        scene_info: Per-scene results from process_scene for the new scenes
+        workers: Number of writer threads
+
+    Returns:
+        The updated manifest dictionary
+    """
+    manifest = load_manifest(output_dir)
+    jobs = _add_shards(output_dir, manifest, scene_info)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda job: write_json_rows(*job), jobs))
+
+    for table, rows in tables.items():
+        if table not in SHARDED_TABLES:
+            append_json_rows(output_dir / f"{table}.json", rows)
+
+    with open(output_dir / MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"✅ Appended {len(scene_info)} scene shards to {output_dir}")
+
+    return manifest
+
+
+def load_manifest(output_dir: Path) -> Dict[str, Any]:
+    with open(output_dir / MANIFEST_NAME, "r") as f:
+        return json.load(f)
+
+
+def load_shard(output_dir: Path, entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Load the rows of one manifest entry."""
+    with open(output_dir / entry["path"], "r") as f:
+        return json.load(f)
+
+
+def iter_table_shards(output_dir: Path, table: str, workers: Optional[int] = None):
+    """
+    Yield (manifest entry, rows) for every shard of a table in manifest order.
+
+    Shards are read concurrently; at most `workers` shards are in flight.
+    """
+    entries = load_manifest(output_dir)["tables"][table]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        yield from zip(entries, pool.map(lambda entry: load_shard(output_dir, entry), entries))
+
+
+def merge_shards(output_dir: Path, merged_dir: Optional[Path] = None):
+    """
+    Rebuild the classic monolithic <table>.json files from a sharded output.
+
+    Args:
+        output_dir: Sharded annotation output directory
+        merged_dir: Where to write the merged tables (defaults to output_dir)
+    """
+    merged_dir = merged_dir or output_dir
+    manifest = load_manifest(output_dir)
+
+    for table, entries in manifest["tables"].items():
+        def rows():
+            for entry in entries:
+                yield from load_shard(output_dir, entry)
+
+        output_file = merged_dir / f"{table}.json"
+        write_json_rows(output_file, rows())
+        print(f"✅ {table}.json merged from {len(entries)} shards at {output_file}")
+
+    if merged_dir != output_dir:
+        # Copy the tables that were never sharded
+        for path in output_dir.glob("*.json"):
+            if path.name != MANIFEST_NAME:
+                (merged_dir / path.name).write_bytes(path.read_bytes())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge a scene-sharded output into monolithic tables")
+    parser.add_argument("output_dir", type=str, help="Sharded annotation output directory")
+    parser.add_argument("--merged_dir", type=str, default=None, help="Where to write the monolithic tables")
+    args = parser.parse_args()
+
+    merge_shards(Path(args.output_dir), Path(args.merged_dir) if args.merged_dir else None)
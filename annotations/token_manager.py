@@ -1,6 +1,75 @@
 import uuid
 import json
-from typing import Dict, Optional
+import sqlite3
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+# Sensor channels; sensor.json and calibrated_sensor.json use the bare
+# channel name as the sensor's token name
+SENSOR_CHANNELS = {
+    "lidar",
+    "ring_front_left", "ring_front_right", "ring_front_center",
+    "ring_rear_left", "ring_rear_right",
+    "ring_side_left", "ring_side_right",
+    "stereo_front_left", "stereo_front_right"
+}
+
+# Per-scene name families, which are also their kind: prefix -> offset
+# added to the scene part to get the 1-based scene number
+#   scene_<n>                          sample_<n>_<frame>
+#   ego_pose_<n>_<frame>               inst_<n>_<track uuid | default>
+#   ann_<n>_<i>                        log_<n>
+#   sd_<channel>_<n - 1>_<frame>       (sample_data counts scenes from 0)
+SCENE_FAMILIES = {
+    "scene": 0,
+    "sample": 0,
+    "ego_pose": 0,
+    "inst": 0,
+    "ann": 0,
+    "log": 0,
+    "sd": 1
+}
+
+# Scene-independent families: prefix -> kind
+STATIC_FAMILIES = {
+    "calib": "calib",
+    "sensor": "sensor",
+    "attr": "attr",
+    "cat": "cat",
+    "map": "map"
+}
+
+
+def token_kind_scene(name: str) -> Tuple[str, Optional[int]]:
+    """
+    Split a token name into its entity kind and 1-based scene number.
+
+    Every name family the converter creates is mapped explicitly, e.g.
+    'inst_3_<uuid>' -> ('inst', 3), 'ego_pose_3_10' -> ('ego_pose', 3),
+    'sd_ring_front_left_2_10' -> ('sd', 3), 'ring_front_left' ->
+    ('sensor', None) and 'calib_lidar' -> ('calib', None). Unknown names
+    get their first part as kind and no scene.
+    """
+    if name in SENSOR_CHANNELS:
+        return "sensor", None
+
+    for prefix, offset in SCENE_FAMILIES.items():
+        if not name.startswith(prefix + "_"):
+            continue
+        rest = name[len(prefix) + 1:].split("_")
+        if prefix == "sd":
+            # sd_<channel>_<scene - 1>_<frame>; the channel itself contains '_'
+            scene = rest[-2] if len(rest) >= 3 else ""
+        else:
+            scene = rest[0]
+        if scene.isdigit():
+            return prefix, int(scene) + offset
+
+    prefix = name.split("_")[0]
+    if prefix in STATIC_FAMILIES:
+        return STATIC_FAMILIES[prefix], None
+    return prefix, None
 
 
 class TokenManager:
@@ -90,6 +159,32 @@ class TokenManager:
             json.dump(self.tokens, f, indent=4)
         print(f"✅ Tokens saved to {path}")
 
+    def save_index(self, path: str):
+        """
+        Save tokens to an SQLite database indexed by (kind, scene).
+
+        Consumers can then fetch e.g. all instance tokens of one scene with
+        an index lookup instead of loading and scanning the whole JSON map.
+        Rows keep the insertion order of the token map.
+        """
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        if tmp.exists():
+            tmp.unlink()
+
+        with sqlite3.connect(tmp) as db:
+            db.execute("CREATE TABLE tokens (name TEXT PRIMARY KEY, token TEXT NOT NULL, kind TEXT NOT NULL, scene INTEGER)")
+            db.executemany(
+                "INSERT INTO tokens VALUES (?, ?, ?, ?)",
+                ((name, token, *token_kind_scene(name)) for name, token in self.tokens.items())
+            )
+            db.execute("CREATE INDEX tokens_kind_scene ON tokens (kind, scene)")
+        db.close()
+
+        # Replace atomically so readers never see a half-written index
+        tmp.replace(path)
+        print(f"✅ Token index saved to {path}")
+
     def load(self, path: str):
         """Load tokens from a JSON file and rebuild reverse lookup."""
         with open(path, "r") as f:
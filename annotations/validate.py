@@ -0,0 +1,192 @@
+import json
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+# table -> [(field, referenced table)]; list-valued fields are checked per element
+FOREIGN_KEYS = {
+    "scene": [("log_token", "log"), ("first_sample_token", "sample"), ("last_sample_token", "sample")],
+    "sample": [("scene_token", "scene")],
+    "sample_data": [
+        ("sample_token", "sample"),
+        ("ego_pose_token", "ego_pose"),
+        ("calibrated_sensor_token", "calibrated_sensor")
+    ],
+    "sample_annotation": [
+        ("sample_token", "sample"),
+        ("instance_token", "instance"),
+        ("category_token", "category"),
+        ("visibility_token", "visibility"),
+        ("attribute_tokens", "attribute")
+    ],
+    "instance": [
+        ("category_token", "category"),
+        ("first_annotation_token", "sample_annotation"),
+        ("last_annotation_token", "sample_annotation")
+    ],
+    "calibrated_sensor": [("sensor_token", "sensor")],
+    "map": [("log_tokens", "log")]
+}
+
+# Tables whose rows form prev/next linked lists
+CHAINED_TABLES = ("sample", "sample_data", "sample_annotation")
+
+TABLES = [
+    "attribute", "calibrated_sensor", "category", "ego_pose", "instance", "log", "map",
+    "sample", "sample_annotation", "sample_data", "scene", "sensor", "visibility"
+]
+
+
+def extract_columns(table: str, rows: List[Dict[str, Any]]) -> Dict[str, list]:
+    """Pull the token column and every column the checks need out of a table."""
+    fields = [field for field, _ in FOREIGN_KEYS.get(table, [])]
+    if table in CHAINED_TABLES:
+        fields += ["prev", "next"]
+
+    columns = {"token": [row.get("token") for row in rows]}
+    for field in fields:
+        columns[field] = [row.get(field) for row in rows]
+    return columns
+
+
+def load_columns(path: Path) -> Tuple[str, Optional[Dict[str, list]]]:
+    """Parse one table file and return its columns (runs in a worker process)."""
+    table = path.stem
+    if not path.exists():
+        return table, None
+    with open(path, "r") as f:
+        rows = json.load(f)
+    return table, extract_columns(table, rows)
+
+
+def check_columns(columns: Dict[str, Dict[str, list]], max_violations: int = 1000) -> List[Dict[str, Any]]:
+    """
+    Check token uniqueness, foreign keys and prev/next chains.
+
+    Every table's token set is built once, after which each row is visited a
+    constant number of times, so the whole check is O(total rows).
+
+    Args:
+        columns: Table name -> columns as returned by extract_columns
+        max_violations: Stop recording violations after this many
+
+    Returns:
+        List of violations, each with table, row, token, field, value and message
+    """
+    violations = []
+
+    def report(table, row, field, value, message):
+        if len(violations) < max_violations:
+            violations.append({
+                "table": table,
+                "row": row,
+                "token": columns[table]["token"][row],
+                "field": field,
+                "value": value,
+                "message": message
+            })
+
+    # Token -> row position for every table
+    positions = {}
+    for table, cols in columns.items():
+        position = {}
+        for i, token in enumerate(cols["token"]):
+            if token in position:
+                report(table, i, "token", token, f"duplicate token (first seen at row {position[token]})")
+            else:
+                position[token] = i
+        positions[table] = position
+
+    for table, cols in columns.items():
+        for field, target in FOREIGN_KEYS.get(table, []):
+            if target not in positions:
+                continue
+            targets = positions[target]
+            for i, value in enumerate(cols[field]):
+                values = value if isinstance(value, list) else [value]
+                for v in values:
+                    if v not in targets:
+                        report(table, i, field, v, f"dangling reference to {target}")
+
+        if table not in CHAINED_TABLES:
+            continue
+
+        position = positions[table]
+        tokens = cols["token"]
+        prevs = cols["prev"]
+        nexts = cols["next"]
+        for i, token in enumerate(tokens):
+            nxt = nexts[i]
+            if nxt:
+                j = position.get(nxt)
+                if j is None:
+                    report(table, i, "next", nxt, f"dangling reference to {table}")
+                elif prevs[j] != token:
+                    report(table, i, "next", nxt, f"next row {j} does not point back (prev={prevs[j]!r})")
+            prv = prevs[i]
+            if prv:
+                j = position.get(prv)
+                if j is None:
+                    report(table, i, "prev", prv, f"dangling reference to {table}")
+                elif nexts[j] != token:
+                    report(table, i, "prev", prv, f"prev row {j} does not point forward (next={nexts[j]!r})")
+
+    return violations
+
+
+def validate_tables(tables: Dict[str, List[Dict[str, Any]]], max_violations: int = 1000) -> List[Dict[str, Any]]:
+    """Validate tables that are already in memory, e.g. data_to_save in main()."""
+    columns = {table: extract_columns(table, rows) for table, rows in tables.items()}
+    return check_columns(columns, max_violations)
+
+
+def validate_dir(annotation_dir: Path, workers: Optional[int] = None, max_violations: int = 1000) -> List[Dict[str, Any]]:
+    """
+    Validate a converted annotation directory.
+
+    Table files are parsed in parallel worker processes; only the columns the
+    checks need are sent back to the parent.
+
+    Args:
+        annotation_dir: Directory holding the <table>.json files
+        workers: Number of worker processes (defaults to CPU count)
+        max_violations: Stop recording violations after this many
+
+    Returns:
+        List of violations
+    """
+    paths = [annotation_dir / f"{table}.json" for table in TABLES]
+
+    columns = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for table, cols in pool.map(load_columns, paths):
+            if cols is None:
+                print(f"⚠ Missing table: {table}.json")
+                continue
+            columns[table] = cols
+
+    return check_columns(columns, max_violations)
+
+
+def print_report(violations: List[Dict[str, Any]]):
+    """Print a short per-violation report."""
+    if not violations:
+        print("✅ No referential integrity violations found")
+        return
+
+    print(f"⚠ {len(violations)} referential integrity violations:")
+    for v in violations:
+        print(f"  {v['table']}[{v['row']}] token={v['token']} {v['field']}={v['value']!r}: {v['message']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check token references in converted nuScenes tables")
+    parser.add_argument("annotation_dir", type=str, help="Directory holding the converted <table>.json files")
+    parser.add_argument("--workers", type=int, default=None, help="Number of parser processes")
+    parser.add_argument("--max_violations", type=int, default=1000, help="Stop after this many violations")
+    args = parser.parse_args()
+
+    violations = validate_dir(Path(args.annotation_dir), args.workers, args.max_violations)
+    print_report(violations)
+    raise SystemExit(1 if violations else 0)
@@ -0,0 +1,394 @@
+import os
+import json
+import time
+import socket
+import argparse
+import threading
+import uuid
+from pathlib import Path
+from multiprocessing import Process
+from typing import List, Dict, Any, Optional
+from token_manager import TokenManager
+from main import process_scene, write_tables
+
+# Shared-filesystem work queue for process_scene. Every state change is an
+# atomic rename inside one directory tree, so any number of machines can
+# work on the same queue without a coordinator:
+#   queue/config.json              base_data_dir of the conversion
+#   queue/todo/scene_0003.json     waiting work item
+#   queue/claimed/scene_0003.json.<host>.<pid>.<id>
+#                                  claimed; the suffix names the owner and the
+#                                  mtime is the owner's heartbeat
+#   queue/claimed/.scene_0003.json.<host>.<pid>.<id>.release
+#                                  claim being moved back to todo/ or failed/
+#   queue/done/scene_0003.json     finished
+#   queue/failed/scene_0003.json   gave up after max_attempts
+#   queue/partial/scene_0003.json  per-scene result (scene_info + tokens)
+#   queue/cache/                   scene timing caches
+QUEUE_DIRS = ["todo", "claimed", "done", "failed", "partial"]
+CONFIG_NAME = "config.json"
+
+
+def item_name(scene_number: int) -> str:
+    return f"scene_{scene_number:04d}.json"
+
+
+def claim_item_name(claimed: Path) -> str:
+    """Work item name of a claim file, e.g. scene_0003.json."""
+    return claimed.name.split(".json.", 1)[0] + ".json"
+
+
+def new_owner_id() -> str:
+    """Unique owner suffix for one claim."""
+    return f"{socket.gethostname()}.{os.getpid()}.{uuid.uuid4().hex[:8]}"
+
+
+def release_claim(queue_dir: Path, claimed: Path, update: Dict[str, Any], state: str) -> bool:
+    """
+    Move a claim to todo/ or failed/ with updated contents, if it is still ours.
+
+    The claim is first renamed to a hidden private name in claimed/: that
+    rename only succeeds while nobody has recovered the claim, and stale
+    recovery leaves fresh hidden files alone, so the contents can be
+    rewritten safely before the item is published again. A release file
+    left behind by a crash is swept back by recover_stale_claims once it is
+    stale.
+
+    Returns:
+        False if the claim no longer existed (someone else owns the scene now)
+    """
+    private = claimed.with_name(f".{claimed.name}.release")
+    try:
+        os.rename(claimed, private)
+    except FileNotFoundError:
+        return False
+    # The rename keeps the claim's mtime, which is already old when the claim is stale
+    os.utime(private)
+    item = read_json(private)
+    item.update(update)
+    write_json_atomic(private, item)
+    os.replace(private, queue_dir / state / claim_item_name(claimed))
+    return True
+
+
+def write_json_atomic(path: Path, data: Any):
+    """Write a JSON file under a temporary name and rename it into place."""
+    tmp = path.with_name(f".{path.name}.{socket.gethostname()}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def read_json(path: Path) -> Any:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def init_queue(queue_dir: Path, scene_numbers: List[int], base_data_dir: str):
+    """
+    Create the queue and enqueue every scene that is not queued or done yet.
+
+    Args:
+        queue_dir: Queue root on the shared filesystem
+        scene_numbers: Scenes to convert
+        base_data_dir: Folder containing argov2_1 ... argov2_N, as seen by the workers
+    """
+    for name in QUEUE_DIRS:
+        (queue_dir / name).mkdir(parents=True, exist_ok=True)
+    write_json_atomic(queue_dir / CONFIG_NAME, {"base_data_dir": str(base_data_dir)})
+
+    queued = 0
+    for scene_number in scene_numbers:
+        name = item_name(scene_number)
+        if (queue_dir / "todo" / name).exists() or (queue_dir / "done" / name).exists():
+            continue
+        if any((queue_dir / "claimed").glob(f"{name}.*")):
+            continue
+        write_json_atomic(queue_dir / "todo" / name, {"scene": scene_number, "attempts": 0})
+        queued += 1
+    print(f"✅ Queued {queued} scenes in {queue_dir}")
+
+
+# ---------------------------------------------------------
+# Claims
+# ---------------------------------------------------------
+
+def claim_next(queue_dir: Path) -> Optional[Path]:
+    """
+    Claim the first waiting item.
+
+    The rename from todo/ to claimed/ succeeds for exactly one worker; the
+    others get FileNotFoundError and try the next item. The claim name
+    carries a unique owner id, so a worker whose claim was recovered and
+    re-claimed by someone else can never touch, release or finish the new
+    owner's claim.
+
+    Returns:
+        Path of the claimed item, or None if nothing is waiting
+    """
+    for item in sorted((queue_dir / "todo").glob("scene_*.json")):
+        claimed = queue_dir / "claimed" / f"{item.name}.{new_owner_id()}"
+        try:
+            # Refresh the mtime before the rename, so the claim is never seen
+            # with the old todo/ mtime and recovered as stale right away
+            os.utime(item)
+            os.rename(item, claimed)
+        except FileNotFoundError:
+            continue
+        return claimed
+    return None
+
+
+def recover_stale_claims(queue_dir: Path, stale_after: float, max_attempts: int = 3) -> int:
+    """
+    Put claims whose heartbeat is older than stale_after seconds back in todo/.
+
+    A stale claim means its worker died (OOM, SIGKILL, node crash), so it
+    counts as a failed attempt; a scene that keeps killing its workers ends
+    up in failed/ after max_attempts. Release files of workers that died
+    while releasing a claim are published again as they are: to failed/ if
+    they already reached max_attempts, to todo/ otherwise.
+
+    Returns:
+        Number of recovered items
+    """
+    recovered = 0
+    now = time.time()
+    for claimed in (queue_dir / "claimed").glob("scene_*.json.*"):
+        try:
+            if now - claimed.stat().st_mtime < stale_after:
+                continue
+            attempts = read_json(claimed).get("attempts", 0) + 1
+        except FileNotFoundError:
+            continue  # Finished or recovered by someone else meanwhile
+
+        state = "failed" if attempts >= max_attempts else "todo"
+        update = {"attempts": attempts, "error": f"claim {claimed.name} went stale"}
+        if release_claim(queue_dir, claimed, update, state):
+            print(f"⚠ Recovered stale claim {claimed.name}, moved to {state}/")
+            recovered += 1
+
+    for private in (queue_dir / "claimed").glob(".scene_*.json.*.release"):
+        try:
+            if now - private.stat().st_mtime < stale_after:
+                continue
+            item = read_json(private)
+        except FileNotFoundError:
+            continue  # Release finished or swept by someone else meanwhile
+
+        state = "failed" if item.get("attempts", 0) >= max_attempts else "todo"
+        try:
+            os.replace(private, queue_dir / state / claim_item_name(private.with_name(private.name[1:])))
+        except FileNotFoundError:
+            continue
+        print(f"⚠ Recovered interrupted release {private.name}, moved to {state}/")
+        recovered += 1
+    return recovered
+
+
+class Heartbeat:
+    """Touch a claim file periodically while its scene is being converted."""
+
+    def __init__(self, path: Path, interval: float):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                return  # Claim was recovered by another worker
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+# ---------------------------------------------------------
+# Workers
+# ---------------------------------------------------------
+
+def run_item(queue_dir: Path, claimed: Path, base_data_dir: str, max_attempts: int):
+    """
+    Convert one claimed scene and record the result.
+
+    The partial result is written atomically before the claim moves to
+    done/, so a crash in between only causes the scene to be redone. If
+    the claim was recovered while this worker was still busy, the scene is
+    converted twice and the last complete partial wins.
+    """
+    item = read_json(claimed)
+    scene_number = item["scene"]
+    name = claim_item_name(claimed)
+
+    try:
+        tokens = TokenManager()
+        scene_info = process_scene(scene_number, base_data_dir, tokens, queue_dir / "cache")
+    except Exception as e:
+        attempts = item.get("attempts", 0) + 1
+        state = "failed" if attempts >= max_attempts else "todo"
+        if release_claim(queue_dir, claimed, {"attempts": attempts, "error": str(e)}, state):
+            print(f"⚠ Scene {scene_number} failed ({e}), moved it to {state}/")
+        else:
+            print(f"⚠ Scene {scene_number} failed ({e}); its claim was already recovered")
+        return
+
+    # Scenes with missing inputs are done too; their partial holds no scene_info
+    write_json_atomic(queue_dir / "partial" / name, {"scene_info": scene_info, "tokens": tokens.tokens})
+    try:
+        os.replace(claimed, queue_dir / "done" / name)
+    except FileNotFoundError:
+        print(f"⚠ Claim on scene {scene_number} was recovered meanwhile; its partial was still written")
+
+
+def run_worker(queue_dir: Path, stale_after: float = 600.0, poll: float = 5.0, max_attempts: int = 3) -> int:
+    """
+    Convert scenes from the queue until there is nothing left to do.
+
+    A worker that finds todo/ empty keeps polling while other claims are
+    outstanding, so it can take over scenes whose owner died.
+
+    Args:
+        queue_dir: Queue root created by init_queue
+        stale_after: Seconds without a heartbeat before a claim is recovered
+        poll: Seconds between checks while waiting for other workers
+        max_attempts: Times a failing scene is retried before it goes to failed/
+
+    Returns:
+        Number of scenes this worker processed
+    """
+    base_data_dir = read_json(queue_dir / CONFIG_NAME)["base_data_dir"]
+    processed = 0
+
+    while True:
+        recover_stale_claims(queue_dir, stale_after, max_attempts)
+        claimed = claim_next(queue_dir)
+        if claimed is None:
+            if not any((queue_dir / "claimed").glob("scene_*.json.*")):
+                break
+            time.sleep(poll)
+            continue
+
+        with Heartbeat(claimed, stale_after / 4):
+            run_item(queue_dir, claimed, base_data_dir, max_attempts)
+        processed += 1
+
+    print(f"✅ Worker {socket.gethostname()}:{os.getpid()} finished after {processed} scenes")
+    return processed
+
+
+# ---------------------------------------------------------
+# Merge
+# ---------------------------------------------------------
+
+def rewrite_tokens(value: Any, aliases: Dict[str, str]) -> Any:
+    """Replace aliased tokens anywhere in a row (strings, lists and nested dicts)."""
+    if isinstance(value, str):
+        return aliases.get(value, value)
+    if isinstance(value, list):
+        return [rewrite_tokens(v, aliases) for v in value]
+    if isinstance(value, dict):
+        return {k: rewrite_tokens(v, aliases) for k, v in value.items()}
+    return value
+
+
+def merge_partials(queue_dir: Path, output_root: Path, layout: str = "monolithic", columnar: Optional[str] = None):
+    """
+    Assemble the global tables and token map from the per-scene partials.
+
+    Names that several workers created independently (log, categories,
+    sensors, ...) got different tokens on each worker. The first partial in
+    scene order defines the token; later partials are rewritten to it.
+
+    Args:
+        queue_dir: Queue root
+        output_root: Output root; tables go to <output_root>/annotation
+        layout: "monolithic" or "sharded"
+        columnar: Optional "arrow" or "parquet" export
+    """
+    waiting = [
+        *(queue_dir / "todo").glob("scene_*.json"),
+        *(queue_dir / "claimed").glob("scene_*.json.*")
+    ]
+    if waiting:
+        print(f"⚠ {len(waiting)} scenes are not finished yet; merging the finished ones")
+    failed = sorted(p.name for p in (queue_dir / "failed").glob("scene_*.json"))
+    if failed:
+        print(f"⚠ Failed scenes left out: {failed}")
+
+    tokens = TokenManager()
+    scene_info = []
+    for path in sorted((queue_dir / "partial").glob("scene_*.json")):
+        partial = read_json(path)
+
+        aliases = {}
+        for name, token in partial["tokens"].items():
+            kept = tokens.ensure_consistent(name, token)
+            if kept != token:
+                aliases[token] = kept
+
+        info = partial["scene_info"]
+        if info is None:
+            continue
+        if aliases:
+            info["scene_data"] = rewrite_tokens(info["scene_data"], aliases)
+        scene_info.append(info)
+
+    annotation_path = Path(output_root) / "annotation"
+    annotation_path.mkdir(parents=True, exist_ok=True)
+    write_tables(annotation_path, tokens, scene_info, layout, columnar)
+    print(f"✅ Merged {len(scene_info)} scenes from {queue_dir}")
+
+
+def run_local(queue_dir: Path, workers: int, **worker_args):
+    """Run several worker processes against one queue directory and wait for them."""
+    processes = [Process(target=run_worker, args=(queue_dir,), kwargs=worker_args) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed scene conversion through a shared-filesystem queue")
+    parser.add_argument("command", choices=["init", "worker", "merge", "local"], help="local = init, N workers, merge")
+    parser.add_argument("--queue", type=str, required=True, help="Queue directory on the shared filesystem")
+    parser.add_argument(
+        "--base_data_dir",
+        type=str,
+        default=r"C:\Users\mitvi\Downloads\argov2_00000\argov2_00000",
+        help="Base folder containing argov2_1 ... argov2_N"
+    )
+    parser.add_argument(
+        "--output_root",
+        type=str,
+        default=r"C:\Users\mitvi\Downloads\argov2_00000\output",
+        help="Output root; merged tables are written to <output_root>/annotation"
+    )
+    parser.add_argument("--scenes", type=int, nargs="+", default=[1, 2, 3, 4, 5], help="Scene numbers to convert")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes for the local command")
+    parser.add_argument("--stale_after", type=float, default=600.0, help="Seconds without heartbeat before a claim is recovered")
+    parser.add_argument("--poll", type=float, default=5.0, help="Seconds between queue checks while waiting")
+    parser.add_argument("--max_attempts", type=int, default=3, help="Retries of a failing scene")
+    parser.add_argument("--layout", choices=["monolithic", "sharded"], default="monolithic", help="Output layout of the merge")
+    parser.add_argument("--columnar", choices=["arrow", "parquet"], default=None, help="Columnar export of the merge")
+    args = parser.parse_args()
+
+    queue_dir = Path(args.queue)
+    worker_args = {"stale_after": args.stale_after, "poll": args.poll, "max_attempts": args.max_attempts}
+
+    if args.command in ("init", "local"):
+        init_queue(queue_dir, args.scenes, args.base_data_dir)
+    if args.command == "worker":
+        run_worker(queue_dir, **worker_args)
+    if args.command == "local":
+        run_local(queue_dir, args.workers, **worker_args)
+    if args.command in ("merge", "local"):
+        merge_partials(queue_dir, Path(args.output_root), args.layout, args.columnar)
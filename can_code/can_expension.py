@@ -1,185 +1,665 @@
+import sys
 import json
-import csv
+import argparse
+import itertools
 from pathlib import Path
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
+from can_store import write_can_columns
 
-def read_csv_timestamps(csv_path: str) -> List[int]:
-    """Read timestamps from CSV file."""
-    with open(csv_path, 'r') as f:
-        reader = csv.reader(f)
-        return [int(row[0]) for row in reader if row]
+# Shared helpers used by both the annotation and CAN pipelines
+sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+from scene_timing import scene_timestamps
 
-def process_can_file(input_path: str, output_path: str, timestamps: List[int]):
-    """Process a single CAN file to update timestamps and trim entries."""
+# CAN stream file suffix -> key of its statistics in meta.json
+CAN_STREAMS = {
+    "ms_imu.json": "MS_IMU",
+    "pose.json": "POSE",
+    "route.json": "ROUTE",
+    "steeranglefeedback.json": "STEER_ANGLE_FEEDBACK",
+    "vehicle_monitor.json": "VEHICLE_MONITOR",
+    "zoe_veh_info.json": "ZOE_VEH_INFO",
+    "zoesensors.json": "ZoeSensors"
+}
+
+# Parsed source streams, shared read-only by the scenes processed in this process
+_SOURCES: Dict[str, Any] = {}
+
+def _init_sources(sources: Dict[str, Any]):
+    global _SOURCES
+    _SOURCES = sources
+
+def read_csv_timestamps(csv_path: str, cache_dir: Optional[Path] = None) -> List[int]:
+    """Read timestamps from CSV file through the scene timing index (cached in cache_dir if given)."""
+    return scene_timestamps(Path(csv_path).parent, cache_dir).tolist()
+
+def is_numeric(value) -> bool:
+    # bools are ints in Python and have always been counted as numeric fields
+    return isinstance(value, (int, float))
+
+def stream_columns(data: List[Dict[str, Any]]) -> Tuple[List[str], np.ndarray]:
+    """
+    Convert CAN messages into a columnar float64 matrix.
+
+    Returns the numeric field names (excluding utime) in first-seen order and
+    a (messages, fields) matrix with NaN where a message lacks the field or
+    holds a non-numeric value.
+    """
+    fields = []
+    seen = set()
+    for entry in data:
+        for key, value in entry.items():
+            if key != "utime" and key not in seen and is_numeric(value):
+                seen.add(key)
+                fields.append(key)
+
+    matrix = np.empty((len(data), len(fields)), dtype=np.float64)
+    for j, key in enumerate(fields):
+        matrix[:, j] = [
+            value if is_numeric(value := entry.get(key)) else np.nan
+            for entry in data
+        ]
+    return fields, matrix
+
+def calculate_column_stats(matrix: np.ndarray) -> List[Dict[str, float]]:
+    """
+    Calculate value and diff statistics for every column of a matrix at once.
+
+    NaN entries are treated as absent: diffs are taken between consecutive
+    present values, exactly as if each column had been collected as a list.
+    """
+    if matrix.shape[0] == 0:
+        return [{} for _ in range(matrix.shape[1])]
+
+    if not np.isnan(matrix).any():
+        # Common case: every message carries every field, one reduction per stat
+        diffs = np.abs(np.diff(matrix, axis=0))
+        has_diffs = diffs.shape[0] > 0
+        columns = {
+            "max": matrix.max(axis=0),
+            "min": matrix.min(axis=0),
+            "mean": matrix.mean(axis=0),
+            "std": matrix.std(axis=0),
+            "max_diff": diffs.max(axis=0) if has_diffs else np.zeros(matrix.shape[1]),
+            "mean_diff": diffs.mean(axis=0) if has_diffs else np.zeros(matrix.shape[1]),
+            "min_diff": diffs.min(axis=0) if has_diffs else np.zeros(matrix.shape[1]),
+            "std_diff": diffs.std(axis=0) if has_diffs else np.zeros(matrix.shape[1])
+        }
+        return [
+            {name: float(values[j]) for name, values in columns.items()}
+            for j in range(matrix.shape[1])
+        ]
+
+    return [calculate_stats(column[~np.isnan(column)]) for column in matrix.T]
+
+def calculate_stats(values) -> Dict[str, float]:
+    """Calculate statistics for a list of values."""
+    if len(values) == 0:
+        return {}
+
+    values = np.asarray(values, dtype=np.float64)
+    diffs = np.abs(np.diff(values)) if len(values) > 1 else np.zeros(1)
+
+    return {
+        "max": float(np.max(values)),
+        "min": float(np.min(values)),
+        "mean": float(np.mean(values)),
+        "std": float(np.std(values)),
+        "max_diff": float(np.max(diffs)),
+        "mean_diff": float(np.mean(diffs)),
+        "min_diff": float(np.min(diffs)),
+        "std_diff": float(np.std(diffs))
+    }
+
+def stream_stats(data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the meta.json statistics entry for one CAN stream."""
+    # Calculate timespan and frequency
+    if len(data) > 1 and 'utime' in data[0]:
+        timespan = (data[-1]['utime'] - data[0]['utime']) / 1e6
+        freq = len(data) / timespan if timespan > 0 else 0
+    else:
+        timespan = 0
+        freq = 0
+
+    stats = {
+        "message_count": len(data),
+        "timespan": timespan,
+        "message_freq": freq,
+        "var_stats": {}
+    }
+
+    fields, matrix = stream_columns(data)
+    present = (~np.isnan(matrix)).sum(axis=0)
+    for field, count, field_stats in zip(fields, present, calculate_column_stats(matrix)):
+        if count > 1:  # Need at least 2 values for meaningful stats
+            stats["var_stats"][field] = field_stats
+
+    return stats
+
+def resample_can_stream(
+    data: List[Dict[str, Any]],
+    target_times: List[int],
+    discrete: str = "hold",
+    time_scale: float = 1e-3,
+    align_start: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Resample a CAN stream onto a target clock, keeping its own utime as the
+    source clock.
+
+    Continuous fields (any field holding a float) are linearly interpolated
+    for all channels at once: one searchsorted call finds the bracketing
+    messages of every target time and a single matrix blend produces every
+    column. Discrete fields (ints/bools only) and non-numeric fields are
+    taken from one source message, either the last one at or before the
+    target time ("hold") or the closest one ("nearest"). Targets outside the
+    source range are clamped to the first/last message, like np.interp.
+
+    Args:
+        data: CAN messages with a utime field
+        target_times: Target clock, e.g. the scene's LiDAR timestamps
+        discrete: "hold" or "nearest" for discrete and non-numeric fields
+        time_scale: Factor converting target times to utime units
+            (LiDAR nanoseconds -> CAN microseconds by default)
+        align_start: Shift the target clock so its first timestamp lines up
+            with the first CAN message; needed when the CAN source was
+            recorded on a different clock than the scene
+
+    Returns:
+        One message per target time, with utime set to the target time
+    """
+    if discrete not in ("hold", "nearest"):
+        raise ValueError(f"Unknown discrete resampling method: {discrete}")
+
+    target = np.asarray(target_times, dtype=np.int64)
+    if len(target) == 0:
+        return []
+
+    src = np.array([entry["utime"] for entry in data], dtype=np.int64)
+    order = np.argsort(src, kind="stable")
+    src = src[order]
+    messages = [data[i] for i in order.tolist()]
+
+    fields, matrix = stream_columns(messages)
+    continuous = [
+        j for j, key in enumerate(fields)
+        if any(isinstance(entry.get(key), float) for entry in messages)
+    ]
+
+    if align_start:
+        query = (target - target[0]) * time_scale + src[0]
+    else:
+        query = target * time_scale
+
+    n = len(src)
+    if n == 1:
+        left = right = np.zeros(len(target), dtype=np.int64)
+        weight = np.zeros(len(target))
+    else:
+        # Bracketing source messages and blend weight for every target at once
+        right = np.clip(np.searchsorted(src, query, side="right"), 1, n - 1)
+        left = right - 1
+        span = (src[right] - src[left]).astype(np.float64)
+        weight = np.divide(query - src[left], span, out=np.zeros(len(target)), where=span > 0)
+        weight = np.clip(weight, 0.0, 1.0)
+
+    if discrete == "hold":
+        pick = np.clip(np.searchsorted(src, query, side="right") - 1, 0, n - 1)
+    else:
+        pick = np.where(weight < 0.5, left, right)
+
+    cols = matrix[:, continuous]
+    values = cols[left] * (1.0 - weight)[:, None] + cols[right] * weight[:, None]
+    names = [fields[j] for j in continuous]
+
+    resampled = []
+    for row, utime, interpolated in zip(pick.tolist(), target.tolist(), values.tolist()):
+        entry = dict(messages[row], utime=utime)
+        for name, value in zip(names, interpolated):
+            if value == value:  # NaN where a bracketing message lacks the field
+                entry[name] = value
+        resampled.append(entry)
+    return resampled
+
+def load_can_stream(input_path: str) -> Optional[Any]:
+    """Parse a CAN JSON file, returning None if it is not valid JSON."""
     try:
         with open(input_path, 'r') as f:
-            data = json.load(f)
+            return json.load(f)
     except json.JSONDecodeError as e:
         print(f"  Error parsing JSON in {input_path} - {e}")
-        return
+        return None
+
+def rewrite_can_stream(
+    data: Any,
+    output_path: str,
+    timestamps: List[int],
+    name: str = "",
+    resample: Optional[str] = None,
+    columnar: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Trim a parsed CAN stream to the scene's timestamps and write it.
+
+    With resample="hold" or "nearest" the stream is instead resampled onto
+    the timestamps with resample_can_stream, keeping every message's signal.
+    With columnar=True the rewritten stream is also stored as a columnar
+    <output stem>.cols directory (see can_store).
+
+    `data` is never modified, so one parsed source can be shared by every
+    scene. The meta.json statistics are computed from the in-memory messages
+    before they are written, so the output never has to be read back.
 
+    Returns:
+        The stream's statistics entry for meta.json, or None if the data is
+        not a CAN message stream
+    """
     if not data:
-        return
+        return None
 
+    stats = None
     if isinstance(data, list) and data and isinstance(data[0], dict) and "utime" in data[0]:
         original_len = len(data)
-        data = data[:len(timestamps)]
-        for i, entry in enumerate(data):
-            entry["utime"] = timestamps[i]
-        print(f"  Processed {len(data)}/{original_len} entries")
+        if resample:
+            data = resample_can_stream(data, timestamps, resample)
+            print(f"  Resampled {original_len} entries onto {len(data)} timestamps")
+        else:
+            utimes = np.asarray(timestamps, dtype=np.int64)[:original_len].tolist()
+            data = [dict(entry, utime=utime) for entry, utime in zip(data, utimes)]
+            print(f"  Processed {len(data)}/{original_len} entries")
+        stats = stream_stats(data)
+        if columnar:
+            write_can_columns(data, Path(output_path).with_suffix(".cols"))
 
     elif isinstance(data, dict) and "message_count" in str(data):
         print("  Skipping meta file")
     else:
-        print(f"  Unsupported format: {input_path}")
-        return
+        print(f"  Unsupported format: {name}")
+        return None
 
     with open(output_path, "w") as f:
         json.dump(data, f, indent=2)
 
-def calculate_stats(values: List[float]) -> Dict[str, float]:
-    """Calculate statistics for a list of values."""
-    if not values:
-        return {}
+    return stats
 
-    values = np.array(values, dtype=np.float64)
-    diffs = np.diff(values) if len(values) > 1 else [0]
+def process_can_file(input_path: str, output_path: str, timestamps: List[int]) -> Optional[Dict[str, Any]]:
+    """Process a single CAN file to update timestamps and trim entries."""
+    data = load_can_stream(input_path)
+    if data is None:
+        return None
+    return rewrite_can_stream(data, output_path, timestamps, input_path)
 
-    return {
-        "max": float(np.max(values)),
-        "min": float(np.min(values)),
-        "mean": float(np.mean(values)),
-        "std": float(np.std(values)),
-        "max_diff": float(np.max(np.abs(diffs))) if len(diffs) > 0 else 0.0,
-        "mean_diff": float(np.mean(np.abs(diffs))) if len(diffs) > 0 else 0.0,
-        "min_diff": float(np.min(np.abs(diffs))) if len(diffs) > 0 else 0.0,
-        "std_diff": float(np.std(np.abs(diffs))) if len(diffs) > 0 else 0.0
-    }
+# ---------------------------------------------------------
+# Streaming mode: bounded memory for multi-GB streams
+# ---------------------------------------------------------
 
-def update_meta_file(meta_path: Path, data_dir: Path):
-    """Update meta.json with statistics from other CAN files."""
-    with open(meta_path, "r") as f:
-        meta = json.load(f)
-
-    # Extract scene number (e.g., "0001" from "scene-0001_meta.json")
-    scene_num = meta_path.stem.split('_')[0].split('-')[-1]
-    
-    file_patterns = {
-        f"scene-{scene_num}_ms_imu.json": "MS_IMU",
-        f"scene-{scene_num}_pose.json": "POSE",
-        f"scene-{scene_num}_route.json": "ROUTE",
-        f"scene-{scene_num}_steeranglefeedback.json": "STEER_ANGLE_FEEDBACK",
-        f"scene-{scene_num}_vehicle_monitor.json": "VEHICLE_MONITOR",
-        f"scene-{scene_num}_zoe_veh_info.json": "ZOE_VEH_INFO",
-        f"scene-{scene_num}_zoesensors.json": "ZoeSensors"
-    }
+class OnlineStats:
+    """Running max/min/mean/std merged batch by batch (Chan/Welford)."""
 
-    for file_path, meta_key in file_patterns.items():
-        full_path = data_dir / file_path
-        if not full_path.exists():
-            print(f"  Missing: {file_path}")
-            continue
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.max = -np.inf
+        self.min = np.inf
 
-        try:
-            with open(full_path, 'r') as f:
-                data = json.load(f)
-        except json.JSONDecodeError:
-            print(f"  Bad JSON in {file_path}")
-            continue
+    def update(self, values: np.ndarray):
+        n = len(values)
+        if n == 0:
+            return
+        batch_mean = float(values.mean())
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += batch_m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.max = max(self.max, float(values.max()))
+        self.min = min(self.min, float(values.min()))
 
-        if not isinstance(data, list) or not data:
-            continue
+    def result(self, suffix: str = "") -> Dict[str, float]:
+        if self.count == 0:
+            return {f"max{suffix}": 0.0, f"min{suffix}": 0.0, f"mean{suffix}": 0.0, f"std{suffix}": 0.0}
+        return {
+            f"max{suffix}": self.max,
+            f"min{suffix}": self.min,
+            f"mean{suffix}": self.mean,
+            f"std{suffix}": float(np.sqrt(self.m2 / self.count))
+        }
 
-        # Calculate timespan and frequency
-        if len(data) > 1 and 'utime' in data[0]:
-            timespan = (data[-1]['utime'] - data[0]['utime']) / 1e6
-            freq = len(data) / timespan if timespan > 0 else 0
-        else:
-            timespan = 0
-            freq = 0
-
-        stats = {
-            "message_count": len(data),
-            "timespan": timespan,
-            "message_freq": freq,
-            "var_stats": {}
+class FieldStats:
+    """Online value and absolute-diff statistics for one CAN field."""
+
+    def __init__(self):
+        self.values = OnlineStats()
+        self.diffs = OnlineStats()
+        self.last = None
+
+    def update(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        chained = values if self.last is None else np.concatenate(([self.last], values))
+        self.diffs.update(np.abs(np.diff(chained)))
+        self.values.update(values)
+        self.last = values[-1]
+
+    def result(self) -> Dict[str, float]:
+        # Same key order as calculate_stats, so meta.json is unchanged
+        diffs = self.diffs.result("_diff")
+        return {
+            **self.values.result(),
+            **{key: diffs[key] for key in ("max_diff", "mean_diff", "min_diff", "std_diff")}
         }
 
-        # Calculate statistics for each field
-        fields = {}
-        for entry in data:
-            for key, value in entry.items():
-                if key == 'utime' or not isinstance(value, (int, float)):
-                    continue
-                fields.setdefault(key, []).append(value)
+def iter_json_array(path: str, chunk_size: int = 1 << 20, max_buffer: int = 64 << 20):
+    """
+    Yield the elements of a top-level JSON array one at a time.
+
+    Only a window of about chunk_size characters (or one element, if larger)
+    is held in memory. An element that still does not decode once the window
+    holds more than max_buffer characters raises ValueError instead of
+    reading the rest of a malformed file into memory.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r") as f:
+        buf = ""
+        pos = 0
+        started = False
+        eof = False
+
+        while True:
+            # Skip whitespace and separators, refilling the window as needed
+            while pos < len(buf) and (buf[pos].isspace() or (started and buf[pos] == ",")):
+                pos += 1
+            if pos >= len(buf) or pos > chunk_size:
+                buf = buf[pos:]
+                pos = 0
+            if pos >= len(buf):
+                if eof:
+                    raise ValueError(f"Unexpected end of JSON array in {path}")
+                more = f.read(chunk_size)
+                eof = not more
+                buf += more
+                continue
+
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError(f"{path} is not a JSON array")
+                started = True
+                pos += 1
+                continue
+
+            if buf[pos] == "]":
+                return
 
-        for field, values in fields.items():
-            if len(values) > 1:  # Need at least 2 values for meaningful stats
-                stats["var_stats"][field] = calculate_stats(values)
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+                # A number cut at the chunk edge decodes as a shorter number, so
+                # only accept an element once its separator is in the window
+                after = end
+                while after < len(buf) and buf[after].isspace():
+                    after += 1
+            except json.JSONDecodeError:
+                end = after = None
+            if end is None or after == len(buf) or buf[after] not in ",]":
+                # Element may continue in the next chunk
+                if eof:
+                    raise ValueError(f"Malformed JSON array element in {path}")
+                if len(buf) - pos > max_buffer:
+                    raise ValueError(f"JSON array element in {path} exceeds {max_buffer} characters")
+                more = f.read(chunk_size)
+                eof = not more
+                buf += more
+                continue
 
-        meta[meta_key] = stats
+            yield obj
+            pos = end
 
-    # Save updated meta file
-    with open(meta_path, "w") as f:
+def first_json_char(path: str) -> str:
+    """Return the first non-whitespace character of a file."""
+    with open(path, "r") as f:
+        while True:
+            chunk = f.read(4096)
+            if not chunk:
+                return ""
+            stripped = chunk.lstrip()
+            if stripped:
+                return stripped[0]
+
+def stream_can_file(
+    input_path: str,
+    output_path: str,
+    timestamps: List[int],
+    batch_size: int = 10000
+) -> Optional[Dict[str, Any]]:
+    """
+    Streaming counterpart of process_can_file.
+
+    Messages are read, re-timestamped and written one at a time, and the
+    meta.json statistics come from online accumulators updated per batch,
+    so memory stays constant whatever the file size. Reading stops once
+    every timestamp has been used.
+
+    Returns:
+        The stream's statistics entry for meta.json, or None if the file is
+        not a CAN message stream
+    """
+    if first_json_char(input_path) != "[":
+        # meta.json and other small non-array files
+        return process_can_file(input_path, output_path, timestamps)
+
+    messages = iter_json_array(input_path)
+    try:
+        first = next(messages)
+    except StopIteration:
+        return None
+    except ValueError as e:
+        print(f"  Error parsing JSON in {input_path} - {e}")
+        return None
+
+    if not isinstance(first, dict) or "utime" not in first:
+        print(f"  Unsupported format: {input_path}")
+        return None
+
+    fields: Dict[str, FieldStats] = {}
+    count = 0
+    first_utime = last_utime = None
+    batch = []
+
+    def flush():
+        names, matrix = stream_columns(batch)
+        for j, name in enumerate(names):
+            column = matrix[:, j]
+            fields.setdefault(name, FieldStats()).update(column[~np.isnan(column)])
+        batch.clear()
+
+    try:
+        with open(output_path, "w") as f:
+            for utime, entry in zip(timestamps, itertools.chain([first], messages)):
+                entry["utime"] = utime
+                f.write("[\n  " if count == 0 else ",\n  ")
+                f.write(json.dumps(entry, indent=2).replace("\n", "\n  "))
+
+                if first_utime is None:
+                    first_utime = utime
+                last_utime = utime
+                count += 1
+
+                batch.append(entry)
+                if len(batch) >= batch_size:
+                    flush()
+            f.write("[]" if count == 0 else "\n]")
+    except ValueError as e:
+        print(f"  Error parsing JSON in {input_path} - {e}")
+        return None
+    flush()
+
+    timespan = (last_utime - first_utime) / 1e6 if count > 1 else 0
+    stats = {
+        "message_count": count,
+        "timespan": timespan,
+        "message_freq": count / timespan if timespan > 0 else 0,
+        "var_stats": {
+            name: field.result() for name, field in fields.items()
+            if field.values.count > 1  # Need at least 2 values for meaningful stats
+        }
+    }
+    print(f"  Streamed {count} entries")
+    return stats
+
+def write_meta_file(meta: Dict[str, Any], output_path: Path, stats: Dict[str, Dict[str, Any]]):
+    """Write meta.json with the statistics collected while processing the streams."""
+    meta = {**meta, **stats}
+
+    with open(output_path, "w") as f:
         json.dump(meta, f, indent=2)
     print("  Meta file updated")
 
-def main():
-    base_dir = Path(r"C:\Users\mitvi\Downloads\argov2_00000")
-    canbus_temp = base_dir / "canbus_temp"
-    output_dir = base_dir / "output" / "canbus"
-    output_dir.mkdir(parents=True, exist_ok=True)
+def process_scene(
+    scene: int,
+    csv_path: Path,
+    output_dir: Path,
+    source_dir: Optional[Path] = None,
+    resample: Optional[str] = None,
+    columnar: bool = False,
+    cache_dir: Optional[Path] = None
+) -> int:
+    """
+    Write all CAN streams and meta.json of one scene from the shared sources.
 
-    # Process each scene (1-5)
-    for scene in range(1, 6):
-        print(f"\n=== Processing Scene {scene} ===")
-        
-        # For all scenes, use canbus_temp as the source
-        source_dir = canbus_temp
-        
-        # Path to CSV with timestamps
-        csv_path = base_dir / "argov2_00000" / f"argov2_{scene}" / "pcd_bin_files.csv"
-        if not csv_path.exists():
-            print(f"  CSV not found: {csv_path}")
-            continue
+    Runs in a worker process; the parsed streams come from _SOURCES. When
+    source_dir is given (streaming mode) the streams are instead streamed
+    from the source files and only meta.json is taken from _SOURCES.
+    resample and columnar are passed on to rewrite_can_stream; the scene's
+    timing index is cached in cache_dir.
+    """
+    print(f"\n=== Processing Scene {scene} ===")
 
-        # Read timestamps
-        timestamps = read_csv_timestamps(str(csv_path))
-        if not timestamps:
-            print("  No timestamps found in CSV")
-            continue
+    # Path to CSV with timestamps
+    if not csv_path.exists():
+        print(f"  CSV not found: {csv_path}")
+        return scene
 
-        # Process each CAN file
-        can_files = [
-            "meta.json",
-            "ms_imu.json",
-            "pose.json",
-            "route.json",
-            "steeranglefeedback.json",
-            "vehicle_monitor.json",
-            "zoe_veh_info.json",
-            "zoesensors.json"
-        ]
-
-        for file in can_files:
-            input_file = f"scene-0001_{file}"
-            input_path = source_dir / input_file
-            output_path = output_dir / f"scene-{scene:04d}_{file}"
+    # Read timestamps (built once per scene and cached in the output folder)
+    timestamps = read_csv_timestamps(str(csv_path), cache_dir)
+    if not timestamps:
+        print("  No timestamps found in CSV")
+        return scene
 
+    # Process each CAN stream, collecting its statistics on the way
+    stats = {}
+    for file, meta_key in CAN_STREAMS.items():
+        output_path = output_dir / f"scene-{scene:04d}_{file}"
+        if source_dir is not None:
+            input_path = source_dir / f"scene-0001_{file}"
             if not input_path.exists():
-                print(f"  Not found: {input_file}")
                 continue
+            print(f"Streaming scene-0001_{file} as scene {scene}...")
+            stream = stream_can_file(str(input_path), str(output_path), timestamps)
+        elif file in _SOURCES:
+            print(f"Processing scene-0001_{file} as scene {scene}...")
+            stream = rewrite_can_stream(
+                _SOURCES[file], str(output_path), timestamps, f"scene-0001_{file}", resample, columnar
+            )
+        else:
+            continue
 
-            print(f"Processing {input_file} as scene {scene}...")
-            process_can_file(str(input_path), str(output_path), timestamps)
+        if stream is not None:
+            stats[meta_key] = stream
 
-        # Update meta.json with statistics
-        meta_path = output_dir / f"scene-{scene:04d}_meta.json"
-        if meta_path.exists():
-            update_meta_file(meta_path, output_dir)
+    # Write meta.json once, with the statistics already computed
+    if isinstance(_SOURCES.get("meta.json"), dict):
+        write_meta_file(_SOURCES["meta.json"], output_dir / f"scene-{scene:04d}_meta.json", stats)
+
+    return scene
+
+def main(
+    base_dir: Path = Path(r"C:\Users\mitvi\Downloads\argov2_00000"),
+    scenes=range(1, 6),
+    workers: Optional[int] = None,
+    streaming: bool = False,
+    resample: Optional[str] = None,
+    columnar: bool = False
+):
+    """
+    Replicate the scene-0001 CAN streams for every scene.
+
+    Each source stream is parsed once and shared read-only by all scenes;
+    the per-scene rewrite and write are fanned out over a process pool.
+
+    Args:
+        base_dir: Folder containing canbus_temp and argov2_00000
+        scenes: Scene numbers to produce
+        workers: Number of worker processes (1 runs everything in-process)
+        streaming: Stream every CAN file with constant memory instead of
+            parsing the sources up front
+        resample: "hold" or "nearest" to resample every stream onto the
+            LiDAR timestamps instead of truncating it (not with streaming)
+        columnar: Also write every stream as a memory-mappable columnar
+            store (not with streaming)
+    """
+    if streaming and resample:
+        raise ValueError("Resampling needs whole streams and cannot be combined with streaming")
+    if streaming and columnar:
+        raise ValueError("The columnar store needs whole streams and cannot be combined with streaming")
+
+    canbus_temp = base_dir / "canbus_temp"
+    output_dir = base_dir / "output" / "canbus"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    # Timing caches are shared with the annotation converter, never written to the inputs
+    cache_dir = base_dir / "output" / "cache"
+
+    # For all scenes, use canbus_temp as the source; parse every stream once
+    sources = {}
+    for file in ["meta.json"] if streaming else ["meta.json", *CAN_STREAMS]:
+        input_file = f"scene-0001_{file}"
+        input_path = canbus_temp / input_file
+        if not input_path.exists():
+            print(f"  Not found: {input_file}")
+            continue
+
+        print(f"Loading {input_file}...")
+        data = load_can_stream(str(input_path))
+        if data is not None:
+            sources[file] = data
+
+    scenes = list(scenes)
+    csv_paths = [base_dir / "argov2_00000" / f"argov2_{scene}" / "pcd_bin_files.csv" for scene in scenes]
+    source_dir = canbus_temp if streaming else None
+
+    if workers == 1:
+        _init_sources(sources)
+        for scene, csv_path in zip(scenes, csv_paths):
+            process_scene(scene, csv_path, output_dir, source_dir, resample, columnar, cache_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_sources, initargs=(sources,)) as pool:
+            list(pool.map(
+                process_scene, scenes, csv_paths, [output_dir] * len(scenes),
+                [source_dir] * len(scenes), [resample] * len(scenes), [columnar] * len(scenes),
+                [cache_dir] * len(scenes)
+            ))
 
     print("\nProcessing complete!")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Replicate CAN bus streams for every scene")
+    parser.add_argument(
+        "--base_dir",
+        type=str,
+        default=r"C:\Users\mitvi\Downloads\argov2_00000",
+        help="Folder containing canbus_temp and argov2_00000"
+    )
+    parser.add_argument("--scenes", type=int, nargs="+", default=[1, 2, 3, 4, 5], help="Scene numbers to produce")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (1 = no pool)")
+    parser.add_argument("--streaming", action="store_true", help="Stream CAN files with constant memory")
+    parser.add_argument(
+        "--resample",
+        choices=["hold", "nearest"],
+        default=None,
+        help="Resample streams onto the LiDAR timestamps; method for discrete fields"
+    )
+    parser.add_argument("--columnar", action="store_true", help="Also write columnar .cols stores")
+    args = parser.parse_args()
+
+    main(Path(args.base_dir), args.scenes, args.workers, args.streaming, args.resample, args.columnar)
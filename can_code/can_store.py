@@ -0,0 +1,130 @@
+import json
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+# A stream is stored as a directory of .npy files (one per column) plus a
+# schema, so every column can be memory-mapped on its own:
+#   scene-0001_ms_imu.cols/
+#       schema.json          rows, and field name -> file, dtype and shape
+#       utime.npy            int64, sorted
+#       col000.npy ...       bool / int64 / float64, (N,) or (N, k) for vectors
+# Field names are not always valid file names, so the other columns are
+# numbered col###.npy in first-seen field order; schema.json maps each field
+# to its file.
+SCHEMA_NAME = "schema.json"
+
+
+def column_dtype(values: List[Any]) -> Optional[str]:
+    """
+    Pick the storage type of one field, or None if it cannot be stored.
+
+    Missing values force float64 so they can be stored as NaN.
+    """
+    present = [v for v in values if v is not None]
+    if not present:
+        return None
+    if all(isinstance(v, list) for v in present):
+        sizes = {len(v) for v in present}
+        if len(sizes) == 1 and sizes != {0} and all(
+            isinstance(x, (int, float)) and not isinstance(x, bool) for v in present for x in v
+        ):
+            return "float64"
+        return None
+    if len(present) < len(values):
+        return "float64" if all(isinstance(v, (int, float)) for v in present) else None
+    if all(isinstance(v, bool) for v in present):
+        return "bool"
+    if all(isinstance(v, int) for v in present):
+        return "int64"
+    if all(isinstance(v, (int, float)) for v in present):
+        return "float64"
+    return None
+
+
+def write_can_columns(data: List[Dict[str, Any]], store_dir: Path) -> Dict[str, Any]:
+    """
+    Write a CAN stream as a columnar store.
+
+    Messages are sorted by utime so readers can binary-search time ranges.
+    Fields that are neither scalars nor fixed-length numeric vectors
+    (e.g. strings) are left out.
+
+    Args:
+        data: CAN messages with a utime field
+        store_dir: Directory to write the columns to
+
+    Returns:
+        The schema written to schema.json
+    """
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    utime = np.array([entry["utime"] for entry in data], dtype=np.int64)
+    order = np.argsort(utime, kind="stable")
+    np.save(store_dir / "utime.npy", utime[order])
+
+    names = []
+    for entry in data:
+        for key in entry:
+            if key != "utime" and key not in names:
+                names.append(key)
+
+    schema = {"rows": len(data), "columns": {"utime": {"file": "utime.npy", "dtype": "int64"}}}
+    for i, name in enumerate(names):
+        values = [entry.get(name) for entry in data]
+        dtype = column_dtype(values)
+        if dtype is None:
+            continue
+
+        if any(isinstance(v, list) for v in values):
+            width = next(len(v) for v in values if v is not None)
+            column = np.array([v if v is not None else [np.nan] * width for v in values], dtype=np.float64)
+        else:
+            column = np.array([v if v is not None else np.nan for v in values], dtype=dtype)
+
+        # Field names are not always valid file names
+        file_name = f"col{i:03d}.npy"
+        np.save(store_dir / file_name, column[order])
+        schema["columns"][name] = {"file": file_name, "dtype": dtype, "shape": list(column.shape[1:])}
+
+    with open(store_dir / SCHEMA_NAME, "w") as f:
+        json.dump(schema, f, indent=2)
+    return schema
+
+
+def read_can_columns(
+    store_dir: Path,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    fields: Optional[List[str]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Read a time range of a columnar CAN store.
+
+    Columns are memory-mapped and the range is located with a binary search
+    on utime, so only the requested rows of the requested columns are ever
+    touched.
+
+    Args:
+        store_dir: Directory written by write_can_columns
+        start: First utime to include (inclusive, default: beginning)
+        end: Last utime to include (exclusive, default: end)
+        fields: Columns to return besides utime (default: all)
+
+    Returns:
+        Column name -> read-only array view of the selected rows
+    """
+    store_dir = Path(store_dir)
+    with open(store_dir / SCHEMA_NAME, "r") as f:
+        schema = json.load(f)
+
+    utime = np.load(store_dir / "utime.npy", mmap_mode="r")
+    lo = 0 if start is None else int(np.searchsorted(utime, start, side="left"))
+    hi = len(utime) if end is None else int(np.searchsorted(utime, end, side="left"))
+
+    names = list(schema["columns"]) if fields is None else ["utime", *fields]
+    out = {}
+    for name in names:
+        column = schema["columns"][name]
+        out[name] = np.load(store_dir / column["file"], mmap_mode="r")[lo:hi]
+    return out
@@ -0,0 +1,112 @@
+import os
+import json
+import socket
+from pathlib import Path
+from typing import Optional
+import numpy as np
+
+# Per-scene frame clock shared by the annotation and CAN pipelines:
+#   argov2_N/pcd_bin_files.csv        LiDAR sweep timestamps (preferred)
+#   argov2_N/new_egopose_vehicle.json ego pose timestamps (fallback)
+# The input folders may be read-only or shared, so the optional cache lives in
+# a caller-chosen folder (normally <output>/cache):
+#   <cache_dir>/argov2_N_frame_timestamps.npz  int64 timestamps plus the name,
+#                                              size and mtime of their source
+TIMESTAMP_CSV = "pcd_bin_files.csv"
+EGO_POSE_JSON = "new_egopose_vehicle.json"
+TIMING_CACHE = "frame_timestamps.npz"
+
+
+def read_timestamp_csv(csv_path: Path) -> np.ndarray:
+    """Read the first CSV column as int64 in one vectorized parse."""
+    return np.loadtxt(csv_path, delimiter=",", usecols=0, dtype=np.int64, ndmin=1, comments=None)
+
+
+def read_ego_pose_timestamps(json_path: Path) -> np.ndarray:
+    with open(json_path, "r") as f:
+        poses = json.load(f)
+    return np.array([pose.get("timestamp_ns", 0) for pose in poses], dtype=np.int64)
+
+
+def source_signature(source: Path) -> np.ndarray:
+    """(name, size, mtime_ns) of a timing source, as stored in the cache."""
+    stat = source.stat()
+    return np.array([source.name, str(stat.st_size), str(stat.st_mtime_ns)])
+
+
+def read_timing_cache(cache: Path, source: Path) -> Optional[np.ndarray]:
+    """Cached timestamps, or None if the cache is missing or was built from another source."""
+    try:
+        with np.load(cache, allow_pickle=False) as data:
+            if np.array_equal(data["source"], source_signature(source)):
+                return data["timestamps"]
+    except (OSError, KeyError, ValueError):
+        pass
+    return None
+
+
+def scene_timestamps(scene_dir: Path, cache_dir: Optional[Path] = None) -> np.ndarray:
+    """
+    Return the frame timestamps of a scene as an int64 array.
+
+    The index is built from pcd_bin_files.csv (or the ego poses when the CSV
+    is missing). With a cache_dir it is cached there together with the name,
+    size and mtime of its source, and reused while they still match the
+    source the scene would be read from now.
+
+    Args:
+        scene_dir: Scene folder, e.g. <base>/argov2_3
+        cache_dir: Folder for the timing cache (None reads the source every time)
+
+    Returns:
+        int64 array with one timestamp per frame
+    """
+    scene_dir = Path(scene_dir)
+    source = scene_dir / TIMESTAMP_CSV
+    if not source.exists():
+        source = scene_dir / EGO_POSE_JSON
+    if not source.exists():
+        raise FileNotFoundError(f"No {TIMESTAMP_CSV} or {EGO_POSE_JSON} in {scene_dir}")
+
+    if cache_dir is not None:
+        cache = Path(cache_dir) / f"{scene_dir.name}_{TIMING_CACHE}"
+        timestamps = read_timing_cache(cache, source)
+        if timestamps is not None:
+            return timestamps
+
+    signature = source_signature(source)
+    if source.name == TIMESTAMP_CSV:
+        timestamps = read_timestamp_csv(source)
+    else:
+        timestamps = read_ego_pose_timestamps(source)
+
+    if cache_dir is not None:
+        # Write atomically: converters on several hosts may build the same scene's cache
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_name(f"{cache.name}.{socket.gethostname()}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, timestamps=timestamps, source=signature)
+        os.replace(tmp, cache)
+
+    return timestamps
+
+
+def frame_indices(timestamps: np.ndarray, query) -> np.ndarray:
+    """
+    Map times to the index of the nearest frame.
+
+    Args:
+        timestamps: Sorted frame timestamps from scene_timestamps
+        query: One time or an array of times on the same clock
+
+    Returns:
+        int64 frame index (or array of indices) of the closest frame
+    """
+    query = np.asarray(query, dtype=np.int64)
+    if len(timestamps) < 2:
+        return np.zeros_like(query)
+
+    right = np.clip(np.searchsorted(timestamps, query, side="left"), 1, len(timestamps) - 1)
+    left = right - 1
+    closer_left = (query - timestamps[left]) <= (timestamps[right] - query)
+    return np.where(closer_left, left, right)
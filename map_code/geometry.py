@@ -0,0 +1,134 @@
+import numpy as np
+
+
+def to_xyz(coords):
+    """Argoverse point dicts -> (N, 3) float64 array."""
+    return np.array(
+        [[pt["x"], pt["y"], pt.get("z", 0.0)] for pt in coords],
+        dtype=np.float64
+    ).reshape(-1, 3)
+
+
+def simplify_polyline(xyz, tolerance):
+    """
+    Douglas-Peucker simplification.
+
+    The recursion is replaced by an explicit stack of (start, end) spans and
+    the distances of all interior points of a span to its chord are computed
+    in one vectorized step.
+
+    Args:
+        xyz: (N, 2) or (N, 3) array of vertices
+        tolerance: Maximum allowed deviation in metres
+
+    Returns:
+        Sorted indices of the vertices to keep (always includes both ends)
+    """
+    n = len(xyz)
+    if n < 3 or not tolerance:
+        return np.arange(n)
+
+    pts = xyz[:, :2]
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        a, b = pts[start], pts[end]
+        inner = pts[start + 1:end]
+        ab = b - a
+        length = np.hypot(*ab)
+        if length == 0:
+            dist = np.hypot(*(inner - a).T)
+        else:
+            dist = np.abs(ab[0] * (inner[:, 1] - a[1]) - ab[1] * (inner[:, 0] - a[0])) / length
+
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+
+    return np.flatnonzero(keep)
+
+
+def arc_lengths(xyz):
+    """Cumulative 2D arc length at every vertex."""
+    steps = np.hypot(*np.diff(xyz[:, :2], axis=0).T) if len(xyz) > 1 else np.zeros(0)
+    return np.concatenate(([0.0], np.cumsum(steps)))
+
+
+def resample_polyline(xyz, spacing=None, count=None):
+    """
+    Resample a polyline at fixed arc-length spacing (or to a fixed count).
+
+    All coordinates are interpolated at once with np.interp over the
+    cumulative arc length. The last vertex is always kept.
+
+    Args:
+        xyz: (N, D) array of vertices
+        spacing: Distance between samples in metres
+        count: Number of evenly spaced samples (overrides spacing)
+
+    Returns:
+        (M, D) array of resampled vertices
+    """
+    if len(xyz) < 2:
+        return xyz.copy()
+
+    s = arc_lengths(xyz)
+    total = s[-1]
+    if count is not None:
+        targets = np.linspace(0.0, total, count)
+    else:
+        targets = np.arange(0.0, total, spacing) if total > 0 else np.zeros(1)
+        if total > 0:
+            targets = np.append(targets, total)
+
+    return np.stack([np.interp(targets, s, xyz[:, d]) for d in range(xyz.shape[1])], axis=1)
+
+
+def lane_centerline(left, right, spacing=1.0):
+    """
+    Centerline of a lane from its two boundaries.
+
+    Both boundaries are resampled to the same number of points by normalized
+    arc length and averaged, then the result is resampled at `spacing`.
+    """
+    if len(left) == 0 or len(right) == 0:
+        return np.zeros((0, 3))
+    count = max(len(left), len(right), 2)
+    center = (resample_polyline(left, count=count) + resample_polyline(right, count=count)) / 2.0
+    return resample_polyline(center, spacing=spacing)
+
+
+def centerline_arclines(center):
+    """
+    Express a discretized centerline as nuScenes arcline_path_3 records.
+
+    Every consecutive pair of points becomes a straight ("SSS") arcline, which
+    the nuScenes map expansion discretizes back to the same points.
+    """
+    if len(center) < 2:
+        return []
+
+    delta = np.diff(center[:, :2], axis=0)
+    yaw = np.arctan2(delta[:, 1], delta[:, 0])
+    length = np.hypot(delta[:, 0], delta[:, 1])
+
+    return [
+        {
+            "start_pose": [float(x0), float(y0), float(h)],
+            "end_pose": [float(x1), float(y1), float(h)],
+            "shape": "SSS",
+            "radius": 999.999,
+            "segment_length": [float(l), 0.0, 0.0]
+        }
+        for (x0, y0), (x1, y1), h, l in zip(center[:-1, :2].tolist(), center[1:, :2].tolist(), yaw.tolist(), length.tolist())
+        if l > 0
+    ]
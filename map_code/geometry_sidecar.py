@@ -0,0 +1,128 @@
+import json
+from pathlib import Path
+import numpy as np
+
+# Binary copy of the merged map geometry, next to the map JSON:
+#   merged_nuscenes_map.geometry/
+#       geometry.json                       manifest
+#       node_xyz.npy                        float64 (N, 3)
+#       node_tokens.npy                     fixed-width bytes (N,)
+#       <layer>_tokens.npy                  record tokens of a layer
+#       <layer>_<field>_offsets.npy         CSR offsets into the rows array
+#       <layer>_<field>_rows.npy            node rows of every record's polyline
+MANIFEST_NAME = "geometry.json"
+
+# Node token lists held by each record type
+NODE_FIELDS = {
+    "lane": ["left_boundary", "right_boundary"],
+    "ped_crossing": ["edge1", "edge2"],
+    "drivable_area": ["polygon"]
+}
+
+
+def token_column(tokens):
+    """Pack tokens into a fixed-width bytes array."""
+    return np.array([tok.encode("ascii") for tok in tokens], dtype=bytes)
+
+
+def node_rows_csr(records, field, row):
+    """
+    Pack one node-token field of every record as CSR node rows.
+
+    Returns:
+        (offsets, rows) where record i's polyline is rows[offsets[i]:offsets[i + 1]]
+    """
+    sizes = np.array([len(record[field]) for record in records], dtype=np.int64)
+    offsets = np.zeros(len(records) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    rows = np.fromiter(
+        (row[tok] for record in records for tok in record[field]),
+        dtype=np.int64,
+        count=int(offsets[-1])
+    )
+    return offsets, rows
+
+
+def write_geometry_sidecar(output_dir, node_tokens, node_xyz, map_data):
+    """
+    Write the merged map's nodes and record polylines as .npy files.
+
+    Lanes, crossings and drivable areas reference nodes by row instead of by
+    token, so a loader can memory-map node_xyz and slice out any record's
+    coordinates without parsing the node list of the JSON map.
+
+    Args:
+        output_dir: Sidecar directory
+        node_tokens: Node tokens in row order
+        node_xyz: (N, 3) node coordinates in the same order
+        map_data: Merged map dictionary whose records reference node_tokens
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    np.save(output_dir / "node_xyz.npy", np.asarray(node_xyz, dtype=np.float64).reshape(-1, 3))
+    np.save(output_dir / "node_tokens.npy", token_column(node_tokens))
+    manifest = {
+        "nodes": {"xyz": "node_xyz.npy", "tokens": "node_tokens.npy", "rows": len(node_tokens)},
+        "layers": {}
+    }
+
+    row = {tok: i for i, tok in enumerate(node_tokens)}
+    for layer, fields in NODE_FIELDS.items():
+        records = map_data.get(layer, [])
+        np.save(output_dir / f"{layer}_tokens.npy", token_column([r["token"] for r in records]))
+        entry = {"tokens": f"{layer}_tokens.npy", "rows": len(records), "fields": {}}
+
+        for field in fields:
+            offsets, rows = node_rows_csr(records, field, row)
+            np.save(output_dir / f"{layer}_{field}_offsets.npy", offsets)
+            np.save(output_dir / f"{layer}_{field}_rows.npy", rows)
+            entry["fields"][field] = {
+                "offsets": f"{layer}_{field}_offsets.npy",
+                "rows": f"{layer}_{field}_rows.npy"
+            }
+        manifest["layers"][layer] = entry
+
+    with open(output_dir / MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def load_nodes(sidecar_dir):
+    """
+    Memory-map the node table of a geometry sidecar.
+
+    Returns:
+        (tokens, xyz) as read-only memory-mapped arrays
+    """
+    sidecar_dir = Path(sidecar_dir)
+    with open(sidecar_dir / MANIFEST_NAME, "r") as f:
+        entry = json.load(f)["nodes"]
+    tokens = np.load(sidecar_dir / entry["tokens"], mmap_mode="r")
+    xyz = np.load(sidecar_dir / entry["xyz"], mmap_mode="r")
+    return tokens, xyz
+
+
+def load_polylines(sidecar_dir, layer, field):
+    """
+    Memory-map one polyline field of a layer, e.g. ("lane", "left_boundary").
+
+    Returns:
+        (tokens, offsets, rows) as read-only memory-mapped arrays
+    """
+    sidecar_dir = Path(sidecar_dir)
+    with open(sidecar_dir / MANIFEST_NAME, "r") as f:
+        entry = json.load(f)["layers"][layer]
+    tokens = np.load(sidecar_dir / entry["tokens"], mmap_mode="r")
+    offsets = np.load(sidecar_dir / entry["fields"][field]["offsets"], mmap_mode="r")
+    rows = np.load(sidecar_dir / entry["fields"][field]["rows"], mmap_mode="r")
+    return tokens, offsets, rows
+
+
+def polyline_xyz(xyz, offsets, rows, record):
+    """(K, 3) coordinates of one record's polyline."""
+    return xyz[rows[offsets[record]:offsets[record + 1]]]
+
+
+def geometry_path_for(map_path):
+    """Geometry sidecar directory written next to a merged map JSON."""
+    return Path(map_path).with_suffix(".geometry")
@@ -0,0 +1,185 @@
+import heapq
+from pathlib import Path
+import numpy as np
+
+
+def polyline_length(xy):
+    if len(xy) < 2:
+        return 0.0
+    return float(np.sqrt((np.diff(xy, axis=0) ** 2).sum(axis=1)).sum())
+
+
+def csr_from_lists(neighbor_rows):
+    """Pack a list of neighbor-row lists into (offsets, targets) arrays."""
+    sizes = np.array([len(rows) for rows in neighbor_rows], dtype=np.int64)
+    offsets = np.zeros(len(neighbor_rows) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    targets = np.array([row for rows in neighbor_rows for row in rows], dtype=np.int64)
+    return offsets, targets
+
+
+def gather(offsets, targets, rows):
+    """Concatenated neighbor rows of many rows at once."""
+    starts = offsets[rows]
+    counts = offsets[rows + 1] - starts
+    if counts.sum() == 0:
+        return np.zeros(0, dtype=np.int64)
+    # Position of every output element inside its row's slice
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return targets[np.repeat(starts, counts) + within]
+
+
+class LaneGraph:
+    """
+    Lane connectivity as CSR adjacency arrays.
+
+    Rows are lane positions (in the merged map's lane order). For every
+    relation the neighbors of row r are targets[offsets[r]:offsets[r + 1]].
+    """
+
+    RELATIONS = ["successors", "predecessors", "left", "right"]
+
+    def __init__(self, tokens, lengths, **adjacency):
+        self.tokens = tokens
+        self.lengths = lengths
+        self.row = {str(tok): i for i, tok in enumerate(tokens.tolist())}
+        self.adjacency = {
+            relation: (adjacency[f"{relation}_offsets"], adjacency[f"{relation}_targets"])
+            for relation in self.RELATIONS
+        }
+
+    @classmethod
+    def build(cls, lanes, node_xy):
+        """
+        Build the graph from converted lane records.
+
+        Args:
+            lanes: Lane records whose predecessors/successors/left_neighbor/
+                right_neighbor already hold lane tokens
+            node_xy: Node token -> (x, y)
+        """
+        row = {lane["token"]: i for i, lane in enumerate(lanes)}
+
+        neighbors = {relation: [] for relation in cls.RELATIONS}
+        lengths = np.zeros(len(lanes))
+        for i, lane in enumerate(lanes):
+            neighbors["successors"].append([row[t] for t in lane.get("successors", []) if t in row])
+            neighbors["predecessors"].append([row[t] for t in lane.get("predecessors", []) if t in row])
+            neighbors["left"].append([row[lane["left_neighbor"]]] if lane.get("left_neighbor") in row else [])
+            neighbors["right"].append([row[lane["right_neighbor"]]] if lane.get("right_neighbor") in row else [])
+
+            boundaries = [
+                np.array([node_xy[t] for t in lane[side] if t in node_xy]).reshape(-1, 2)
+                for side in ("left_boundary", "right_boundary")
+            ]
+            lengths[i] = np.mean([polyline_length(b) for b in boundaries])
+
+        adjacency = {}
+        for relation, rows in neighbors.items():
+            adjacency[f"{relation}_offsets"], adjacency[f"{relation}_targets"] = csr_from_lists(rows)
+
+        return cls(np.array([lane["token"] for lane in lanes], dtype=str), lengths, **adjacency)
+
+    def save(self, path):
+        arrays = {"tokens": self.tokens, "lengths": self.lengths}
+        for relation, (offsets, targets) in self.adjacency.items():
+            arrays[f"{relation}_offsets"] = offsets
+            arrays[f"{relation}_targets"] = targets
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        return cls(arrays.pop("tokens"), arrays.pop("lengths"), **arrays)
+
+    def neighbors(self, token, relation="successors"):
+        offsets, targets = self.adjacency[relation]
+        i = self.row[token]
+        return [str(t) for t in self.tokens[targets[offsets[i]:offsets[i + 1]]]]
+
+    def connectivity(self):
+        """nuScenes-style connectivity: lane token -> incoming/outgoing lane tokens."""
+        return {
+            str(tok): {
+                "incoming": self.neighbors(str(tok), "predecessors"),
+                "outgoing": self.neighbors(str(tok), "successors")
+            }
+            for tok in self.tokens.tolist()
+        }
+
+    def reachable(self, start, max_depth=None, relations=("successors",)):
+        """
+        Breadth-first reachability from a lane.
+
+        Each BFS level expands the whole frontier with one vectorized CSR
+        gather per relation.
+
+        Returns:
+            Dict of reachable lane token -> BFS depth (start has depth 0)
+        """
+        depth = np.full(len(self.tokens), -1, dtype=np.int64)
+        frontier = np.array([self.row[start]], dtype=np.int64)
+        depth[frontier] = 0
+
+        level = 0
+        while len(frontier) and (max_depth is None or level < max_depth):
+            level += 1
+            nxt = np.unique(np.concatenate([
+                gather(*self.adjacency[relation], frontier) for relation in relations
+            ]))
+            frontier = nxt[depth[nxt] < 0]
+            depth[frontier] = level
+
+        rows = np.flatnonzero(depth >= 0)
+        return {str(self.tokens[r]): int(depth[r]) for r in rows}
+
+    def route(self, start, goal, lane_change_cost=5.0):
+        """
+        Shortest route between two lanes (Dijkstra).
+
+        Following a successor costs the length of the lane being left; a
+        lane change to a left/right neighbor costs lane_change_cost metres.
+
+        Returns:
+            (list of lane tokens from start to goal, cost), or ([], inf) if
+            the goal is unreachable
+        """
+        source, target = self.row[start], self.row[goal]
+        dist = np.full(len(self.tokens), np.inf)
+        parent = np.full(len(self.tokens), -1, dtype=np.int64)
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+
+        edges = [
+            (*self.adjacency["successors"], None),
+            (*self.adjacency["left"], lane_change_cost),
+            (*self.adjacency["right"], lane_change_cost)
+        ]
+
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u == target:
+                break
+            if d > dist[u]:
+                continue
+            for offsets, targets, cost in edges:
+                step = self.lengths[u] if cost is None else cost
+                for v in targets[offsets[u]:offsets[u + 1]].tolist():
+                    if d + step < dist[v]:
+                        dist[v] = d + step
+                        parent[v] = u
+                        heapq.heappush(heap, (d + step, v))
+
+        if not np.isfinite(dist[target]):
+            return [], np.inf
+
+        path = [target]
+        while path[-1] != source:
+            path.append(int(parent[path[-1]]))
+        return [str(self.tokens[r]) for r in reversed(path)], float(dist[target])
+
+
+def lane_graph_path_for(map_path):
+    """Lane graph file written next to a merged map JSON."""
+    return Path(map_path).with_suffix(".lane_graph.npz")
@@ -0,0 +1,141 @@
+import json
+from pathlib import Path
+import numpy as np
+
+
+# Ego trajectory of a scene, next to its map folder:
+#   argov2_N/new_egopose_vehicle.json
+#   argov2_N/map/map_log_sceneN.json
+EGO_POSE_JSON = "new_egopose_vehicle.json"
+
+# Upper bound on (elements x path segments) bounding-box tests per chunk
+PREFILTER_CELLS = 4_000_000
+
+
+def ego_trajectory_for(scene_path):
+    """Ego pose file of the scene a map_log_sceneN.json belongs to."""
+    return Path(scene_path).parent.parent / EGO_POSE_JSON
+
+
+def read_trajectory(json_path):
+    """(T, 2) city-frame ego positions from new_egopose_vehicle.json."""
+    with open(json_path, "r") as f:
+        poses = json.load(f)
+    return np.array([[pose["tx_m"], pose["ty_m"]] for pose in poses], dtype=np.float64).reshape(-1, 2)
+
+
+# ---------------------------------------------------------
+# Vectorized 2D tests
+# ---------------------------------------------------------
+
+def point_segment_distances(points, a, b):
+    """Distance from every point (P, 2) to every segment a -> b (S, 2): (P, S)."""
+    ab = b - a
+    length2 = (ab ** 2).sum(axis=1)
+    ap = points[:, None, :] - a[None, :, :]
+    t = np.clip(
+        np.divide((ap * ab).sum(axis=2), length2, out=np.zeros((len(points), len(a))), where=length2 > 0),
+        0.0, 1.0
+    )
+    closest = a[None, :, :] + t[:, :, None] * ab[None, :, :]
+    return np.sqrt(((points[:, None, :] - closest) ** 2).sum(axis=2))
+
+
+def _orientation(a, b, c):
+    """Sign of the turn a -> b -> c for segments a -> b (P, 2) and points c (Q, 2): (P, Q)."""
+    ab = b - a
+    return np.sign(
+        ab[:, None, 0] * (c[None, :, 1] - a[:, None, 1]) - ab[:, None, 1] * (c[None, :, 0] - a[:, None, 0])
+    )
+
+
+def segments_cross(p0, p1, q0, q1):
+    """
+    Proper crossings between segments p0 -> p1 (P) and q0 -> q1 (Q): (P, Q).
+
+    Touching and collinear overlaps are not reported; they put a vertex on
+    the other segment, which the distance test already catches.
+    """
+    straddle_q = _orientation(p0, p1, q0) * _orientation(p0, p1, q1) < 0
+    straddle_p = (_orientation(q0, q1, p0) * _orientation(q0, q1, p1) < 0).T
+    return straddle_q & straddle_p
+
+
+def points_in_ring(points, ring):
+    """Even-odd containment of every point (P, 2) in a closed ring: (P,) bool."""
+    a = ring
+    b = np.roll(ring, -1, axis=0)
+    x, y = points[:, 0:1], points[:, 1:2]
+    crosses = (a[None, :, 1] > y) != (b[None, :, 1] > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_cross = a[None, :, 0] + (y - a[None, :, 1]) * (b - a)[None, :, 0] / (b - a)[None, :, 1]
+    return np.count_nonzero(crosses & (x < x_cross), axis=1) % 2 == 1
+
+
+def ring_near_path(ring, a, b, radius):
+    """
+    Exact test whether a closed ring comes within `radius` of path segments.
+
+    The ring is near the path if a ring vertex is close to a path segment,
+    a path vertex is close to a ring edge, an edge crosses a segment, or the
+    path runs inside the ring.
+    """
+    edge_a = ring
+    edge_b = np.roll(ring, -1, axis=0)
+
+    if point_segment_distances(ring, a, b).min() <= radius:
+        return True
+    if point_segment_distances(np.concatenate([a, b]), edge_a, edge_b).min() <= radius:
+        return True
+    if segments_cross(a, b, edge_a, edge_b).any():
+        return True
+    return len(ring) >= 3 and bool(points_in_ring(a, ring).any())
+
+
+# ---------------------------------------------------------
+# Corridor crop
+# ---------------------------------------------------------
+
+def corridor_mask(rings, trajectory, radius):
+    """
+    Which map elements lie in the ego corridor (trajectory buffered by radius).
+
+    Element bounding boxes are first tested against the radius-expanded
+    bounding boxes of every path segment in one broadcast per chunk; only
+    the surviving elements run the exact ring/path test, and only against
+    the segments whose boxes they touched.
+
+    Args:
+        rings: (K, 2) vertex arrays, each treated as a closed ring
+        trajectory: (T, 2) ego positions in driving order
+        radius: Corridor half-width in metres
+
+    Returns:
+        (len(rings),) bool array, True for elements to keep
+    """
+    keep = np.zeros(len(rings), dtype=bool)
+    if len(rings) == 0 or len(trajectory) == 0:
+        return keep
+
+    # Path segments; a single pose is a zero-length segment
+    if len(trajectory) == 1:
+        a = b = trajectory
+    else:
+        a, b = trajectory[:-1], trajectory[1:]
+    seg_lo = np.minimum(a, b) - radius
+    seg_hi = np.maximum(a, b) + radius
+
+    bboxes = np.array([[*ring.min(axis=0), *ring.max(axis=0)] for ring in rings])
+
+    chunk = max(1, PREFILTER_CELLS // len(a))
+    for start in range(0, len(rings), chunk):
+        box = bboxes[start:start + chunk]
+        hit = (
+            (box[:, None, 0] <= seg_hi[None, :, 0]) & (box[:, None, 2] >= seg_lo[None, :, 0]) &
+            (box[:, None, 1] <= seg_hi[None, :, 1]) & (box[:, None, 3] >= seg_lo[None, :, 1])
+        )
+        for i in np.flatnonzero(hit.any(axis=1)):
+            segs = np.flatnonzero(hit[i])
+            keep[start + i] = ring_near_path(rings[start + i], a[segs], b[segs], radius)
+
+    return keep
@@ -1,7 +1,16 @@
 import json
 import uuid
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 import argparse
+import numpy as np
+from map_index import MapIndex, index_path_for
+from lane_graph import LaneGraph, lane_graph_path_for
+from geometry_sidecar import NODE_FIELDS, write_geometry_sidecar, geometry_path_for
+from map_crop import corridor_mask, ego_trajectory_for, read_trajectory
+from map_union import merge_overlapping_rings
+from map_raster import rasterize_drivable_area, semantic_prior_path
+from geometry import to_xyz, simplify_polyline, lane_centerline, centerline_arclines
 
 
 # ---------------------------------------------------------
@@ -12,44 +21,116 @@ def new_token():
     return str(uuid.uuid4())
 
 
-def convert_xyz_to_nodes(coords, node_list):
-    tokens = []
-    for pt in coords:
-        tok = new_token()
-        node_list.append({
-            "token": tok,
-            "x": float(pt["x"]),
-            "y": float(pt["y"]),
-            "z": float(pt.get("z", 0.0))
-        })
-        tokens.append(tok)
-    return tokens
+# Lane tokens are derived from the Argoverse lane ID, so a lane that appears
+# in several scenes gets the same token in each and links resolve across scenes
+LANE_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "argoverse/lane_segment")
+
+
+def lane_token_for(lane_id):
+    return str(uuid.uuid5(LANE_NAMESPACE, str(lane_id)))
+
+
+class NodeIndex:
+    """
+    Node table with a spatial hash for deduplication.
+
+    Every point is quantized to a grid of `tolerance` metres; points that
+    fall into the same cell share one node. Adjacent lane segments and
+    overlapping scenes therefore reuse the same boundary nodes instead of
+    creating new ones. tolerance=None disables deduplication.
+
+    Coordinates are kept in a float64 (N, 3) array grown by doubling, next
+    to a token list; nuScenes node dicts are only built by records() when
+    the map is written.
+    """
+
+    def __init__(self, tolerance=0.01, capacity=1024):
+        self.tolerance = tolerance
+        self.tokens = []
+        self.cells = {}
+        self._xyz = np.empty((max(capacity, 1), 3), dtype=np.float64)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    @property
+    def xyz(self):
+        """(N, 3) view of the node coordinates, in token order."""
+        return self._xyz[:len(self.tokens)]
+
+    def records(self, start=0):
+        """nuScenes node dicts for rows start.. of the table."""
+        return [
+            {"token": tok, "x": x, "y": y, "z": z}
+            for tok, (x, y, z) in zip(self.tokens[start:], self._xyz[start:len(self.tokens)].tolist())
+        ]
+
+    def add(self, x, y, z, token=None):
+        """
+        Return the token of the node at (x, y, z), creating it if needed.
+        A new node gets `token` if given, otherwise a fresh one.
+        """
+        if self.tolerance:
+            key = (round(x / self.tolerance), round(y / self.tolerance), round(z / self.tolerance))
+            tok = self.cells.get(key)
+            if tok is not None:
+                return tok
+
+        tok = token or new_token()
+        row = len(self.tokens)
+        if row == len(self._xyz):
+            grown = np.empty((2 * row, 3), dtype=np.float64)
+            grown[:row] = self._xyz
+            self._xyz = grown
+        self._xyz[row] = (x, y, z)
+        self.tokens.append(tok)
+        if self.tolerance:
+            self.cells[key] = tok
+        return tok
+
+
+def convert_xyz_to_nodes(coords, nodes, simplify=None):
+    """Add a polyline's points as nodes, optionally Douglas-Peucker simplified first."""
+    xyz = to_xyz(coords)
+    if simplify:
+        xyz = xyz[simplify_polyline(xyz, simplify)]
+    return [nodes.add(x, y, z) for x, y, z in xyz.tolist()]
 
 
 # ---------------------------------------------------------
 # Converters for dataset2 categories
 # ---------------------------------------------------------
 
-def convert_lane_segment(seg, node_list):
-    left_tokens = convert_xyz_to_nodes(seg["left_lane_boundary"], node_list)
-    right_tokens = convert_xyz_to_nodes(seg["right_lane_boundary"], node_list)
+def convert_lane_segment(seg, node_list, token=None, simplify=None):
+    """
+    Convert an Argoverse lane segment.
+
+    Predecessors, successors and neighbors get their lane_token_for() token,
+    also for lanes outside the scene (merge_scenes drops the ones that stay
+    unresolved).
+    """
+    left_tokens = convert_xyz_to_nodes(seg["left_lane_boundary"], node_list, simplify)
+    right_tokens = convert_xyz_to_nodes(seg["right_lane_boundary"], node_list, simplify)
+
+    def lane_token(lane_id):
+        return lane_token_for(lane_id) if lane_id is not None else None
 
     return {
-        "token": new_token(),
+        "token": token or new_token(),
         "lane_type": seg.get("lane_type", "NONE"),
         "left_boundary": left_tokens,
         "right_boundary": right_tokens,
-        "predecessors": seg.get("predecessors", []),
-        "successors": seg.get("successors", []),
-        "left_neighbor": seg.get("left_neighbor_id"),
-        "right_neighbor": seg.get("right_neighbor_id"),
+        "predecessors": [lane_token(i) for i in seg.get("predecessors", []) if lane_token(i)],
+        "successors": [lane_token(i) for i in seg.get("successors", []) if lane_token(i)],
+        "left_neighbor": lane_token(seg.get("left_neighbor_id")),
+        "right_neighbor": lane_token(seg.get("right_neighbor_id")),
         "is_intersection": seg.get("is_intersection", False)
     }
 
 
-def convert_ped_crossing(pc, node_list):
-    edge1 = convert_xyz_to_nodes(pc["edge1"], node_list)
-    edge2 = convert_xyz_to_nodes(pc["edge2"], node_list)
+def convert_ped_crossing(pc, node_list, simplify=None):
+    edge1 = convert_xyz_to_nodes(pc["edge1"], node_list, simplify)
+    edge2 = convert_xyz_to_nodes(pc["edge2"], node_list, simplify)
 
     return {
         "token": new_token(),
@@ -58,6 +139,33 @@ def convert_ped_crossing(pc, node_list):
     }
 
 
+def crop_to_trajectory(d2, trajectory, radius):
+    """
+    Drop lane segments, crossings and drivable areas outside the ego corridor.
+
+    Lanes are tested as the area between their boundaries and crossings as
+    the area between their edges, like in the map index.
+
+    Returns:
+        (lane_segments, pedestrian_crossings, drivable_areas) dicts holding
+        only the elements within `radius` of the trajectory
+    """
+    groups = {
+        "lane_segments": lambda e: np.concatenate([to_xyz(e["left_lane_boundary"]), to_xyz(e["right_lane_boundary"])[::-1]]),
+        "pedestrian_crossings": lambda e: np.concatenate([to_xyz(e["edge1"]), to_xyz(e["edge2"])[::-1]]),
+        "drivable_areas": lambda e: to_xyz(e.get("polygon", []))
+    }
+
+    kept = []
+    for group, ring_of in groups.items():
+        elements = d2.get(group, {})
+        ids = [i for i, e in elements.items() if len(ring_of(e))]
+        mask = corridor_mask([ring_of(elements[i])[:, :2] for i in ids], trajectory, radius)
+        kept.append({i: elements[i] for i, k in zip(ids, mask.tolist()) if k})
+        print(f"  Crop: kept {len(kept[-1])} of {len(elements)} {group}")
+    return tuple(kept)
+
+
 # ---------------------------------------------------------
 # Dummy placeholder generators
 # ---------------------------------------------------------
@@ -92,7 +200,31 @@ def placeholder_empty():
 # Convert a single scene to nuScenes format
 # ---------------------------------------------------------
 
-def convert_scene(scene_path):
+def convert_scene(
+    scene_path, nodes=None, tolerance=0.01, simplify=None, path_spacing=1.0, node_records=True, crop_radius=None
+):
+    """
+    Convert one Argoverse map log to nuScenes map records.
+
+    Args:
+        scene_path: Path of map_log_sceneN.json
+        nodes: NodeIndex shared across scenes (a new one is created if None)
+        tolerance: Node deduplication grid in metres when creating a NodeIndex
+        simplify: Douglas-Peucker tolerance in metres for all boundaries
+            (None keeps every Argoverse vertex)
+        path_spacing: Centerline sample spacing in metres for arcline_path_3
+            (None skips the paths)
+        node_records: Build the "node" dicts; with False the new nodes are
+            only held by the NodeIndex and "node" is left out
+        crop_radius: Only keep map elements within this many metres of the
+            scene's ego trajectory (new_egopose_vehicle.json); None keeps all
+
+    Returns:
+        Dict of node/lane/ped_crossing/drivable_area lists plus the lanes'
+        arcline_path_3 records; "node" only holds the nodes this scene added
+        to the index. Lane tokens come from lane_token_for(), and lane links
+        may point at lanes of other scenes
+    """
     print(f"Converting scene: {scene_path}")
 
     with open(scene_path, "r") as f:
@@ -102,36 +234,204 @@ def convert_scene(scene_path):
         "node": [],
         "lane": [],
         "ped_crossing": [],
-        "drivable_area": []
+        "drivable_area": [],
+        "arcline_path_3": {}
     }
 
-    nodes = out["node"]
+    if nodes is None:
+        nodes = NodeIndex(tolerance)
+    first_node = len(nodes)
+
+    segments = d2.get("lane_segments", {})
+    crossings = d2.get("pedestrian_crossings", {})
+    areas = d2.get("drivable_areas", {})
+    if crop_radius:
+        trajectory = read_trajectory(ego_trajectory_for(scene_path))
+        segments, crossings, areas = crop_to_trajectory(d2, trajectory, crop_radius)
+
+    # lane_segments → lane; tokens follow the Argoverse ID so scenes agree on them
+    for seg_id, seg in segments.items():
+        lane = convert_lane_segment(seg, nodes, lane_token_for(seg_id), simplify=simplify)
+        out["lane"].append(lane)
 
-    # lane_segments → lane
-    for seg_id, seg in d2.get("lane_segments", {}).items():
-        out["lane"].append(convert_lane_segment(seg, nodes))
+        # Discretized centerline from the full-resolution boundaries
+        if path_spacing:
+            center = lane_centerline(to_xyz(seg["left_lane_boundary"]), to_xyz(seg["right_lane_boundary"]), path_spacing)
+            out["arcline_path_3"][lane["token"]] = centerline_arclines(center)
 
     # pedestrian_crossings → ped_crossing
-    for cid, c in d2.get("pedestrian_crossings", {}).items():
-        out["ped_crossing"].append(convert_ped_crossing(c, nodes))
+    for cid, c in crossings.items():
+        out["ped_crossing"].append(convert_ped_crossing(c, nodes, simplify))
 
     # drivable_areas → drivable_area
-    for aid, area in d2.get("drivable_areas", {}).items():
+    for aid, area in areas.items():
         if "polygon" in area:
-            poly_tokens = convert_xyz_to_nodes(area["polygon"], nodes)
+            poly_tokens = convert_xyz_to_nodes(area["polygon"], nodes, simplify)
             out["drivable_area"].append({
                 "token": new_token(),
                 "polygon": poly_tokens
             })
 
+    if node_records:
+        out["node"] = nodes.records(first_node)
+    else:
+        del out["node"]
     return out
 
 
+def convert_scene_worker(scene_path, tolerance, simplify=None, path_spacing=1.0, crop_radius=None):
+    """
+    Convert a scene in a worker process.
+
+    Nodes are shipped back as the NodeIndex token list and (N, 3) coordinate
+    array instead of a list of dicts, which pickles much faster; node dicts
+    are only built once, for the merged map.
+    """
+    nodes = NodeIndex(tolerance)
+    out = convert_scene(
+        scene_path, nodes, simplify=simplify, path_spacing=path_spacing, node_records=False, crop_radius=crop_radius
+    )
+    out["node_tokens"] = nodes.tokens
+    out["node_xyz"] = nodes.xyz
+    return out
+
+
+def remap_node_tokens(scene_out, remap):
+    """Point a scene's records at the merged node tokens."""
+    for record_type, fields in NODE_FIELDS.items():
+        for record in scene_out[record_type]:
+            for field in fields:
+                record[field] = [remap.get(tok, tok) for tok in record[field]]
+
+
+def add_scene(final_out, nodes, scene_out):
+    """Merge one convert_scene_worker result into the merged map and its NodeIndex."""
+    remap = {}
+    for tok, (x, y, z) in zip(scene_out["node_tokens"], scene_out["node_xyz"].tolist()):
+        kept = nodes.add(x, y, z, tok)
+        if kept != tok:
+            remap[tok] = kept
+    if remap:
+        remap_node_tokens(scene_out, remap)
+
+    final_out["lane"].extend(scene_out["lane"])
+    final_out["ped_crossing"].extend(scene_out["ped_crossing"])
+    final_out["drivable_area"].extend(scene_out["drivable_area"])
+    for token, path in scene_out["arcline_path_3"].items():
+        final_out["arcline_path_3"].setdefault(token, path)
+
+
+def merge_duplicate_lanes(lanes):
+    """
+    Keep one record per lane token and resolve links across scenes.
+
+    A lane present in several scenes is kept as first converted, with the
+    links of its later copies added to it. Links to lanes that are in no
+    scene (or were cropped away) are dropped afterwards.
+
+    Returns:
+        The deduplicated lane list, in first-seen order
+    """
+    merged = {}
+    for lane in lanes:
+        kept = merged.setdefault(lane["token"], lane)
+        if kept is lane:
+            continue
+        for field in ("predecessors", "successors"):
+            kept[field] += [tok for tok in lane[field] if tok not in kept[field]]
+        for field in ("left_neighbor", "right_neighbor"):
+            kept[field] = kept[field] or lane[field]
+
+    for lane in merged.values():
+        for field in ("predecessors", "successors"):
+            lane[field] = [tok for tok in lane[field] if tok in merged]
+        for field in ("left_neighbor", "right_neighbor"):
+            if lane[field] not in merged:
+                lane[field] = None
+    return list(merged.values())
+
+
+def union_drivable_areas(areas, nodes):
+    """
+    Replace overlapping drivable areas by their unions.
+
+    Areas that overlap nothing, or whose union would enclose holes, are kept
+    as they are; the outline vertices of a union go through the NodeIndex,
+    so vertices shared with the original polygons reuse their nodes.
+
+    Returns:
+        The new drivable_area list
+    """
+    row = {tok: i for i, tok in enumerate(nodes.tokens)}
+    xyz = nodes.xyz
+    rings = [xyz[[row[tok] for tok in area["polygon"] if tok in row]].reshape(-1, 3) for area in areas]
+
+    merged = []
+    for members, union_rings in merge_overlapping_rings(rings):
+        if union_rings is None:
+            merged.extend(areas[i] for i in members)
+            continue
+        for ring in union_rings:
+            merged.append({
+                "token": new_token(),
+                "polygon": [nodes.add(x, y, z) for x, y, z in ring.tolist()]
+            })
+    return merged
+
+
+def referenced_nodes(map_data, nodes):
+    """
+    Mask of the NodeIndex rows still used by a record.
+
+    Replaced drivable areas and duplicate lanes leave nodes that nothing
+    points at; arcline_path_3 records hold poses, not node tokens, so only
+    the NODE_FIELDS of lanes, crossings and drivable areas count.
+
+    Returns:
+        (N,) bool array in NodeIndex order
+    """
+    used = {
+        tok
+        for record_type, fields in NODE_FIELDS.items()
+        for record in map_data[record_type]
+        for field in fields
+        for tok in record[field]
+    }
+    return np.array([tok in used for tok in nodes.tokens], dtype=bool)
+
+
 # ---------------------------------------------------------
-# Merge 5 scenes
+# Merge scenes
 # ---------------------------------------------------------
 
-def merge_scenes(scene_paths, output_path):
+def merge_scenes(
+    scene_paths, output_path, tolerance=0.01, workers=None, simplify=None, path_spacing=1.0,
+    prior_root=None, prior_resolution=0.1, geometry_sidecar=False, crop_radius=None, union_areas=False
+):
+    """
+    Convert every scene and merge them into one nuScenes map.
+
+    Scenes are converted in a process pool. Results are merged in
+    scene_paths order, so the merged lists are deterministic whatever the
+    worker scheduling; nodes shared between scenes are deduplicated during
+    the merge and the scenes' records are re-pointed at the kept nodes.
+
+    Args:
+        scene_paths: map_log_sceneN.json paths, in merge order
+        output_path: Where to write the merged map
+        tolerance: Node deduplication grid in metres (None/0 disables it)
+        workers: Number of worker processes (1 converts in-process)
+        simplify: Douglas-Peucker tolerance in metres (None keeps every vertex)
+        path_spacing: Lane centerline spacing in metres for arcline_path_3
+        prior_root: nuScenes dataroot to write the semantic-prior PNG to
+            (None skips rasterization)
+        prior_resolution: Semantic-prior mask resolution in metres per pixel
+        geometry_sidecar: Also write node coordinates and record polylines
+            as memory-mappable .npy files next to the map
+        crop_radius: Keep only map elements within this many metres of each
+            scene's ego trajectory (None keeps everything)
+        union_areas: Union overlapping drivable areas across scenes (needs shapely)
+    """
 
     final_out = {
         "node": [],
@@ -152,17 +452,51 @@ def merge_scenes(scene_paths, output_path):
         "connectivity": {},
         "arcline_path_3": {},
         "canvas_edge": [0, 0],
+        "canvas_origin": [0, 0],
         "version": "1.0"
     }
 
-    # Process each scene
-    for scene in scene_paths:
-        scene_out = convert_scene(scene)
+    # One node index for all scenes, so overlapping geometry shares nodes
+    nodes = NodeIndex(tolerance)
 
-        final_out["node"].extend(scene_out["node"])
-        final_out["lane"].extend(scene_out["lane"])
-        final_out["ped_crossing"].extend(scene_out["ped_crossing"])
-        final_out["drivable_area"].extend(scene_out["drivable_area"])
+    # Convert scenes in parallel (in-process with workers=1); map() yields results in scene order
+    options = [
+        [option] * len(scene_paths) for option in (tolerance, simplify, path_spacing, crop_radius)
+    ]
+    if workers == 1:
+        for scene_out in map(convert_scene_worker, scene_paths, *options):
+            add_scene(final_out, nodes, scene_out)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for scene_out in pool.map(convert_scene_worker, scene_paths, *options):
+                add_scene(final_out, nodes, scene_out)
+
+    # The same Argoverse lane can come from several scenes; keep it once
+    before = len(final_out["lane"])
+    final_out["lane"] = merge_duplicate_lanes(final_out["lane"])
+    if len(final_out["lane"]) < before:
+        print(f"Lane merge: {before} → {len(final_out['lane'])} lanes")
+
+    # Overlapping scenes repeat the same drivable surface; merge it once
+    if union_areas:
+        before = len(final_out["drivable_area"])
+        final_out["drivable_area"] = union_drivable_areas(final_out["drivable_area"], nodes)
+        print(f"Drivable-area union: {before} → {len(final_out['drivable_area'])} polygons")
+
+    # Only write nodes that a lane, crossing or drivable area still uses
+    keep = referenced_nodes(final_out, nodes)
+    node_tokens = [tok for tok, k in zip(nodes.tokens, keep.tolist()) if k]
+    node_xyz = nodes.xyz[keep]
+    if len(node_tokens) < len(nodes):
+        print(f"Dropped {len(nodes) - len(node_tokens)} unreferenced nodes")
+    final_out["node"] = [
+        {"token": tok, "x": x, "y": y, "z": z} for tok, (x, y, z) in zip(node_tokens, node_xyz.tolist())
+    ]
+
+    # Lane graph in CSR form; connectivity is derived from it
+    node_xy = dict(zip(node_tokens, node_xyz[:, :2].tolist()))
+    lane_graph = LaneGraph.build(final_out["lane"], node_xy)
+    final_out["connectivity"] = lane_graph.connectivity()
 
     # Add placeholders (minimal)
     if len(final_out["polygon"]) == 0:
@@ -198,12 +532,37 @@ def merge_scenes(scene_paths, output_path):
     if len(final_out["lane_connector"]) == 0:
         final_out["lane_connector"].append(placeholder_generic_polygon_token())
 
+    if tolerance:
+        print(f"Node deduplication kept {len(final_out['node'])} unique nodes")
+
+    # Semantic-prior mask referenced by map.json; its extent is the canvas
+    if prior_root is not None:
+        prior_path = semantic_prior_path(prior_root)
+        print("Writing semantic prior:", prior_path)
+        final_out["canvas_edge"], final_out["canvas_origin"] = rasterize_drivable_area(
+            final_out, prior_path, prior_resolution
+        )
+
     # Save merged output
     print("Writing merged map:", output_path)
     with open(output_path, "w") as f:
         json.dump(final_out, f, indent=2)
 
-    print("✔ All 5 scenes merged successfully!")
+    # Spatial index for radius / box / nearest-lane queries
+    index_path = index_path_for(output_path)
+    MapIndex.build(final_out).save(index_path)
+    print("Writing map index:", index_path)
+
+    graph_path = lane_graph_path_for(output_path)
+    lane_graph.save(graph_path)
+    print("Writing lane graph:", graph_path)
+
+    if geometry_sidecar:
+        sidecar_path = geometry_path_for(output_path)
+        write_geometry_sidecar(sidecar_path, node_tokens, node_xyz, final_out)
+        print("Writing geometry sidecar:", sidecar_path)
+
+    print(f"✔ All {len(scene_paths)} scenes merged successfully!")
 
 
 # ---------------------------------------------------------
@@ -211,7 +570,7 @@ def merge_scenes(scene_paths, output_path):
 # ---------------------------------------------------------
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Merge 5 scenes → one nuScenes map")
+    parser = argparse.ArgumentParser(description="Merge scenes → one nuScenes map")
 
     parser.add_argument(
         "--base_folder",
@@ -227,6 +586,75 @@ if __name__ == "__main__":
         help="Output merged nuScenes map file"
     )
 
+    parser.add_argument(
+        "--scenes",
+        type=int,
+        nargs="+",
+        default=[1, 2, 3, 4, 5],
+        help="Scene numbers to merge, in merge order"
+    )
+
+    parser.add_argument(
+        "--node_tolerance",
+        type=float,
+        default=0.01,
+        help="Merge nodes closer than this grid size in metres (0 disables deduplication)"
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of scene conversion processes (1 = no pool)"
+    )
+
+    parser.add_argument(
+        "--simplify",
+        type=float,
+        default=None,
+        help="Douglas-Peucker tolerance in metres for map boundaries (default: keep all vertices)"
+    )
+
+    parser.add_argument(
+        "--path_spacing",
+        type=float,
+        default=1.0,
+        help="Lane centerline spacing in metres for arcline_path_3 (0 disables)"
+    )
+
+    parser.add_argument(
+        "--prior_root",
+        type=str,
+        default=None,
+        help="nuScenes dataroot; rasterizes drivable areas into the maps/*.png that map.json references"
+    )
+
+    parser.add_argument(
+        "--prior_resolution",
+        type=float,
+        default=0.1,
+        help="Semantic-prior mask resolution in metres per pixel"
+    )
+
+    parser.add_argument(
+        "--geometry_sidecar",
+        action="store_true",
+        help="Also write node coordinates and record polylines as .npy files (<output>.geometry/)"
+    )
+
+    parser.add_argument(
+        "--crop_radius",
+        type=float,
+        default=None,
+        help="Keep only map elements within this many metres of each scene's ego trajectory"
+    )
+
+    parser.add_argument(
+        "--union_drivable_areas",
+        action="store_true",
+        help="Union overlapping drivable areas across scenes (requires shapely)"
+    )
+
     args = parser.parse_args()
 
     base = Path(args.base_folder)
@@ -234,7 +662,7 @@ if __name__ == "__main__":
     # expected scene files
     scene_paths = [
         base / f"argov2_{i}" / "map" / f"map_log_scene{i}.json"
-        for i in [1, 2, 3, 4, 5]
+        for i in args.scenes
     ]
 
     # verify
@@ -245,4 +673,9 @@ if __name__ == "__main__":
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    merge_scenes([str(p) for p in scene_paths], str(output_path))
+    merge_scenes(
+        [str(p) for p in scene_paths], str(output_path),
+        args.node_tolerance, args.workers, args.simplify, args.path_spacing,
+        args.prior_root, args.prior_resolution, args.geometry_sidecar, args.crop_radius,
+        args.union_drivable_areas
+    )
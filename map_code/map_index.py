@@ -0,0 +1,298 @@
+from pathlib import Path
+import numpy as np
+
+
+# ---------------------------------------------------------
+# Geometry helpers
+# ---------------------------------------------------------
+
+# Record type -> how to turn a record into a closed ring of node tokens
+LAYERS = {
+    "lane": lambda r: r["left_boundary"] + r["right_boundary"][::-1],
+    "ped_crossing": lambda r: r["edge1"] + r["edge2"][::-1],
+    "drivable_area": lambda r: r["polygon"]
+}
+
+
+def point_ring_distance(ring, x, y):
+    """
+    Distance from (x, y) to a closed ring; 0 if the point is inside.
+
+    All edges are handled in one vectorized pass (projection for the
+    distance, even-odd crossing count for containment).
+    """
+    if len(ring) == 0:
+        return np.inf
+    a = ring
+    b = np.roll(ring, -1, axis=0)
+    ab = b - a
+    ap = np.array([x, y]) - a
+    length2 = (ab ** 2).sum(axis=1)
+    t = np.clip(np.divide((ap * ab).sum(axis=1), length2, out=np.zeros(len(a)), where=length2 > 0), 0.0, 1.0)
+    closest = a + t[:, None] * ab
+    dist = np.sqrt(((closest - [x, y]) ** 2).sum(axis=1)).min()
+
+    if len(ring) >= 3:
+        crosses = (a[:, 1] > y) != (b[:, 1] > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = a[:, 0] + (y - a[:, 1]) * ab[:, 0] / ab[:, 1]
+        if np.count_nonzero(crosses & (x < x_cross)) % 2 == 1:
+            return 0.0
+    return float(dist)
+
+
+def bbox_distance(bboxes, x, y):
+    """Distance from (x, y) to every (xmin, ymin, xmax, ymax) box at once."""
+    dx = np.maximum(np.maximum(bboxes[:, 0] - x, x - bboxes[:, 2]), 0.0)
+    dy = np.maximum(np.maximum(bboxes[:, 1] - y, y - bboxes[:, 3]), 0.0)
+    return np.sqrt(dx * dx + dy * dy)
+
+
+# ---------------------------------------------------------
+# Index
+# ---------------------------------------------------------
+
+class MapIndex:
+    """
+    Uniform-grid spatial index over the merged map's lanes, pedestrian
+    crossings and drivable areas.
+
+    Every element is stored as a 2D ring (concatenated in ring_xy, CSR
+    offsets in ring_offsets) with its bounding box. Each grid cell lists the
+    elements whose bounding box overlaps it, also in CSR form. Radius and
+    box queries read the covered cells, prefilter by bounding box and then
+    test the exact geometry of the few survivors.
+    """
+
+    ARRAYS = [
+        "tokens", "layers", "bboxes", "ring_offsets", "ring_xy",
+        "cell_offsets", "cell_items", "grid_origin", "grid_shape", "cell_size"
+    ]
+
+    def __init__(self, **arrays):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self.layer_names = list(LAYERS)
+
+    @classmethod
+    def build(cls, map_data, cell_size=50.0):
+        """
+        Build the index from a merged map dictionary.
+
+        Args:
+            map_data: Output of merge_scenes (node, lane, ped_crossing, drivable_area)
+            cell_size: Grid cell size in metres
+        """
+        node_xy = {n["token"]: (n["x"], n["y"]) for n in map_data["node"]}
+
+        tokens, layers, rings = [], [], []
+        for layer_id, (layer, ring_tokens) in enumerate(LAYERS.items()):
+            for record in map_data.get(layer, []):
+                ring = [node_xy[tok] for tok in ring_tokens(record) if tok in node_xy]
+                if not ring:
+                    continue
+                tokens.append(record["token"])
+                layers.append(layer_id)
+                rings.append(np.array(ring, dtype=np.float64))
+
+        sizes = np.array([len(r) for r in rings], dtype=np.int64)
+        ring_offsets = np.zeros(len(rings) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=ring_offsets[1:])
+        ring_xy = np.concatenate(rings) if rings else np.zeros((0, 2))
+
+        # Per-element bounding boxes via segment reductions over the CSR rings
+        if rings:
+            starts = ring_offsets[:-1]
+            bboxes = np.stack([
+                np.minimum.reduceat(ring_xy[:, 0], starts),
+                np.minimum.reduceat(ring_xy[:, 1], starts),
+                np.maximum.reduceat(ring_xy[:, 0], starts),
+                np.maximum.reduceat(ring_xy[:, 1], starts)
+            ], axis=1)
+            origin = bboxes[:, :2].min(axis=0)
+            extent = bboxes[:, 2:].max(axis=0)
+        else:
+            bboxes = np.zeros((0, 4))
+            origin = extent = np.zeros(2)
+
+        shape = np.maximum(np.floor((extent - origin) / cell_size).astype(np.int64) + 1, 1)
+
+        # Cell ranges covered by every bounding box
+        lo = np.floor((bboxes[:, :2] - origin) / cell_size).astype(np.int64)
+        hi = np.floor((bboxes[:, 2:] - origin) / cell_size).astype(np.int64)
+        cells, items = [], []
+        for item, ((cx0, cy0), (cx1, cy1)) in enumerate(zip(lo.tolist(), hi.tolist())):
+            cx, cy = np.meshgrid(np.arange(cx0, cx1 + 1), np.arange(cy0, cy1 + 1))
+            cells.append((cx * shape[1] + cy).ravel())
+            items.append(np.full(cx.size, item, dtype=np.int64))
+
+        cells = np.concatenate(cells) if cells else np.zeros(0, dtype=np.int64)
+        items = np.concatenate(items) if items else np.zeros(0, dtype=np.int64)
+        order = np.argsort(cells, kind="stable")
+        cell_offsets = np.zeros(int(shape[0] * shape[1]) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=int(shape[0] * shape[1])), out=cell_offsets[1:])
+
+        return cls(
+            tokens=np.array(tokens, dtype=str),
+            layers=np.array(layers, dtype=np.int8),
+            bboxes=bboxes,
+            ring_offsets=ring_offsets,
+            ring_xy=ring_xy,
+            cell_offsets=cell_offsets,
+            cell_items=items[order],
+            grid_origin=origin,
+            grid_shape=shape,
+            cell_size=np.float64(cell_size)
+        )
+
+    def save(self, path):
+        np.savez(path, **{name: getattr(self, name) for name in self.ARRAYS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{name: data[name] for name in cls.ARRAYS})
+
+    # -----------------------------------------------------
+    # Queries
+    # -----------------------------------------------------
+
+    def _ring(self, item):
+        return self.ring_xy[self.ring_offsets[item]:self.ring_offsets[item + 1]]
+
+    def _layer_mask(self, items, layers):
+        if layers is None:
+            return np.ones(len(items), dtype=bool)
+        ids = [self.layer_names.index(layer) for layer in layers]
+        return np.isin(self.layers[items], ids)
+
+    def _candidates(self, xmin, ymin, xmax, ymax):
+        """Elements registered in the grid cells covering a box."""
+        lo = np.floor((np.array([xmin, ymin]) - self.grid_origin) / self.cell_size).astype(np.int64)
+        hi = np.floor((np.array([xmax, ymax]) - self.grid_origin) / self.cell_size).astype(np.int64)
+        lo = np.maximum(lo, 0)
+        hi = np.minimum(hi, self.grid_shape - 1)
+        if (lo > hi).any():
+            return np.zeros(0, dtype=np.int64)
+
+        chunks = []
+        for cx in range(lo[0], hi[0] + 1):
+            first = cx * self.grid_shape[1]
+            start = self.cell_offsets[first + lo[1]]
+            end = self.cell_offsets[first + hi[1] + 1]
+            chunks.append(self.cell_items[start:end])
+        return np.unique(np.concatenate(chunks))
+
+    def _result(self, items):
+        result = {layer: [] for layer in self.layer_names}
+        for item in items:
+            result[self.layer_names[self.layers[item]]].append(str(self.tokens[item]))
+        return result
+
+    def query_bbox(self, xmin, ymin, xmax, ymax, layers=None):
+        """
+        Tokens of all elements whose bounding box intersects a box.
+
+        Returns:
+            Dict of layer name -> list of tokens
+        """
+        items = self._candidates(xmin, ymin, xmax, ymax)
+        b = self.bboxes[items]
+        hit = (b[:, 0] <= xmax) & (b[:, 2] >= xmin) & (b[:, 1] <= ymax) & (b[:, 3] >= ymin)
+        return self._result(items[hit & self._layer_mask(items, layers)])
+
+    def query_radius(self, x, y, radius, layers=None):
+        """
+        Tokens of all elements whose geometry lies within `radius` of (x, y).
+
+        Returns:
+            Dict of layer name -> list of tokens
+        """
+        items = self._candidates(x - radius, y - radius, x + radius, y + radius)
+        items = items[(bbox_distance(self.bboxes[items], x, y) <= radius) & self._layer_mask(items, layers)]
+        return self._result([item for item in items if point_ring_distance(self._ring(item), x, y) <= radius])
+
+    def _ring_cells(self, q, r):
+        """Elements registered in the cells at Chebyshev distance r from cell q."""
+        nx, ny = (int(n) for n in self.grid_shape)
+        chunks = []
+        for cx in range(max(q[0] - r, 0), min(q[0] + r, nx - 1) + 1):
+            first = cx * ny
+            if abs(cx - q[0]) == r:
+                spans = [(max(q[1] - r, 0), min(q[1] + r, ny - 1))]
+            else:
+                spans = [(cy, cy) for cy in (q[1] - r, q[1] + r) if 0 <= cy < ny]
+            for cy0, cy1 in spans:
+                if cy0 <= cy1:
+                    chunks.append(self.cell_items[self.cell_offsets[first + cy0]:self.cell_offsets[first + cy1 + 1]])
+        return np.unique(np.concatenate(chunks)) if chunks else np.zeros(0, dtype=np.int64)
+
+    def _nearest_scan(self, items, x, y):
+        """Exact nearest of `items`, visited in order of bounding-box distance."""
+        bounds = bbox_distance(self.bboxes[items], x, y)
+        best_item, best = None, np.inf
+        for i in np.argsort(bounds, kind="stable"):
+            if bounds[i] > best:
+                break
+            dist = point_ring_distance(self._ring(items[i]), x, y)
+            if dist < best:
+                best_item, best = items[i], dist
+        return best_item, best
+
+    def nearest(self, x, y, layer="lane"):
+        """
+        Closest element of a layer to (x, y).
+
+        Grid cells are searched in growing square rings around the query's
+        cell. Every element not seen yet only occupies cells outside the
+        rings searched so far, so the search stops once the distance from the
+        query to the edge of that block exceeds the best exact distance
+        found. Without any grid cells it falls back to scanning the layer.
+
+        Returns:
+            (token, distance) or (None, inf) if the layer is empty
+        """
+        layer_id = self.layer_names.index(layer)
+        if len(self.cell_items) == 0:
+            items = np.flatnonzero(self.layers == layer_id)
+            if len(items) == 0:
+                return None, np.inf
+            best_item, best = self._nearest_scan(items, x, y)
+            return str(self.tokens[best_item]), best
+
+        point = np.array([x, y], dtype=np.float64)
+        shape = self.grid_shape.astype(np.int64)
+        q = np.floor((point - self.grid_origin) / self.cell_size).astype(np.int64)
+        # Rings closer than the grid's nearest cell are empty; start at the grid
+        r = int(max(0, (-q).max(), (q - (shape - 1)).max()))
+
+        seen = np.zeros(len(self.tokens), dtype=bool)
+        best_item, best = None, np.inf
+        while True:
+            items = self._ring_cells(q.tolist(), r)
+            items = items[~seen[items]]
+            seen[items] = True
+            items = items[self.layers[items] == layer_id]
+            if len(items):
+                item, dist = self._nearest_scan(items, x, y)
+                if dist < best:
+                    best_item, best = item, dist
+
+            covered = ((q - r) <= 0).all() and ((q + r) >= shape - 1).all()
+            low = self.grid_origin + (q - r) * self.cell_size
+            high = self.grid_origin + (q + r + 1) * self.cell_size
+            if covered or min((point - low).min(), (high - point).min()) >= best:
+                break
+            r += 1
+
+        if best_item is None:
+            return None, np.inf
+        return str(self.tokens[best_item]), best
+
+    def nearest_lane(self, x, y):
+        return self.nearest(x, y, "lane")
+
+
+def index_path_for(map_path):
+    """Index file written next to a merged map JSON."""
+    return Path(map_path).with_suffix(".index.npz")
@@ -1,7 +1,19 @@
+import sys
 import json
+import sqlite3
+import argparse
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Iterator, Optional
 from collections import defaultdict
+import numpy as np
+
+# Sharded annotation outputs are read through the annotation converter's manifest
+sys.path.append(str(Path(__file__).resolve().parent.parent / "annotations"))
+from shards import MANIFEST_NAME, iter_table_shards
+
+# Sample timestamps in the annotation tables are nanoseconds
+TIMESTAMP_UNITS_PER_SECOND = 1_000_000_000
+
 
 def load_token_map(data_dir: Path) -> Tuple[Dict[str, str], Dict[str, str]]:
     """Load and separate instance and sample tokens from the tokens_map.json file."""
@@ -30,92 +42,393 @@ def load_token_map(data_dir: Path) -> Tuple[Dict[str, str], Dict[str, str]]:
     print(f"\nFound {len(instances)} instance tokens and {len(samples)} sample tokens")
     return instances, samples
 
+
+def token_index_path(data_dir: Path) -> Path:
+    """(kind, scene)-indexed copy of tokens_map.json written by TokenManager.save_index."""
+    return data_dir / "annotation" / "tokens_map.sqlite"
+
+
+def load_scene_tokens(db: sqlite3.Connection, kind: str, scene_num: int) -> List[str]:
+    """All tokens of one kind ('inst', 'sample', ...) in one scene, in token map order."""
+    rows = db.execute(
+        "SELECT token FROM tokens WHERE kind = ? AND scene = ? ORDER BY rowid",
+        (kind, scene_num)
+    )
+    return [token for (token,) in rows]
+
+
+# ---------------------------------------------------------
+# Instance -> sample index from the annotation tables
+# ---------------------------------------------------------
+
+def load_table(annotation_dir: Path, name: str) -> List[Dict]:
+    """
+    Rows of one annotation table.
+
+    In a sharded output (see annotations/shards.py) the per-frame tables
+    only exist as per-scene shards; they are concatenated in manifest order,
+    which is the row order of the monolithic table.
+    """
+    manifest_file = annotation_dir / MANIFEST_NAME
+    if manifest_file.exists():
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            sharded = name in json.load(f)["tables"]
+        if sharded:
+            return [row for _, rows in iter_table_shards(annotation_dir, name) for row in rows]
+
+    with open(annotation_dir / f"{name}.json", 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def scene_number(scene_name: str) -> Optional[int]:
+    """Scene number of a scene table name such as "argov2_7"."""
+    try:
+        return int(scene_name.rsplit('_', 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def foreign_rows(parents: List[Dict], children: List[Dict], key: str) -> np.ndarray:
+    """Row of the parent referenced by every child row (-1 if unknown)."""
+    position = {row["token"]: i for i, row in enumerate(parents)}
+    return np.fromiter(
+        (position.get(row.get(key), -1) for row in children),
+        dtype=np.int64,
+        count=len(children)
+    )
+
+
+def parents_from_csr(offsets: np.ndarray, rows: np.ndarray, n_children: int) -> np.ndarray:
+    """Invert a CSR reverse index into the parent row of every child row (-1 if none)."""
+    parent = np.full(n_children, -1, dtype=np.int64)
+    parent[rows] = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    return parent
+
+
+def annotation_index(annotation_dir: Path, timestamps: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Build the instance -> sample index of the annotation tables.
+
+    When the reverse-index sidecar (annotation/index, see index_sidecar.py)
+    is there its CSR arrays are inverted directly, so sample_annotation.json
+    is never parsed; otherwise the foreign keys are resolved from the JSON
+    tables in one pass over the annotations.
+
+    Args:
+        annotation_dir: <data_dir>/annotation
+        timestamps: Also load the sample timestamps (needed for future filtering)
+
+    Returns:
+        Dict of token arrays "scene", "sample", "instance", scene names
+        "scene_name" and row arrays "sample_scene", "ann_sample",
+        "ann_instance" (plus "sample_timestamp" if requested)
+    """
+    scenes = load_table(annotation_dir, "scene")
+    names = {row["token"]: row.get("name", "") for row in scenes}
+
+    index_dir = annotation_dir / "index"
+    manifest = None
+    if (index_dir / "index.json").exists():
+        with open(index_dir / "index.json", 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        required = ("scene_to_sample", "sample_to_annotation", "instance_to_annotation")
+        if not all(name in manifest["indexes"] for name in required):
+            manifest = None
+
+    if manifest is not None:
+        tables = manifest["tables"]
+        index = {
+            table: np.load(index_dir / tables[table]["tokens"]).astype(str)
+            for table in ("scene", "sample", "instance")
+        }
+
+        def parents(name, n_children):
+            entry = manifest["indexes"][name]
+            offsets = np.load(index_dir / entry["offsets"], mmap_mode="r")
+            rows = np.load(index_dir / entry["rows"], mmap_mode="r")
+            return parents_from_csr(offsets, rows, n_children)
+
+        n_annotations = tables["sample_annotation"]["rows"]
+        index["sample_scene"] = parents("scene_to_sample", len(index["sample"]))
+        index["ann_sample"] = parents("sample_to_annotation", n_annotations)
+        index["ann_instance"] = parents("instance_to_annotation", n_annotations)
+
+        if timestamps:
+            sample_times = {row["token"]: row["timestamp"] for row in load_table(annotation_dir, "sample")}
+            index["sample_timestamp"] = np.array(
+                [sample_times.get(tok, 0) for tok in index["sample"].tolist()], dtype=np.int64
+            )
+    else:
+        samples = load_table(annotation_dir, "sample")
+        instances = load_table(annotation_dir, "instance")
+        annotations = load_table(annotation_dir, "sample_annotation")
+        index = {
+            "scene": np.array([row["token"] for row in scenes], dtype=str),
+            "sample": np.array([row["token"] for row in samples], dtype=str),
+            "instance": np.array([row["token"] for row in instances], dtype=str),
+            "sample_scene": foreign_rows(scenes, samples, "scene_token"),
+            "ann_sample": foreign_rows(samples, annotations, "sample_token"),
+            "ann_instance": foreign_rows(instances, annotations, "instance_token")
+        }
+        if timestamps:
+            index["sample_timestamp"] = np.array([row["timestamp"] for row in samples], dtype=np.int64)
+
+    index["scene_name"] = np.array([names.get(tok, "") for tok in index["scene"].tolist()], dtype=str)
+    return index
+
+
+def prediction_pairs(
+    index: Dict[str, np.ndarray],
+    future_seconds: Optional[float] = None
+) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Yield the "<instance>_<sample>" prediction tokens of every scene.
+
+    Only (instance, sample) pairs that are actually annotated are emitted.
+    With future_seconds, a pair is kept only if the instance is still
+    annotated at least that long after the sample. Everything up to the
+    string formatting is vectorized over the annotations; strings are only
+    built one scene at a time.
+
+    Args:
+        index: Output of annotation_index
+        future_seconds: Required annotated future in seconds (None = any)
+
+    Yields:
+        (scene row, list of prediction tokens ordered by instance, then sample)
+    """
+    inst = index["ann_instance"]
+    samp = index["ann_sample"]
+    valid = (inst >= 0) & (samp >= 0)
+    inst, samp = inst[valid], samp[valid]
+
+    scene = index["sample_scene"][samp]
+    valid = scene >= 0
+    inst, samp, scene = inst[valid], samp[valid], scene[valid]
+
+    if future_seconds is not None:
+        t = index["sample_timestamp"][samp]
+        last = np.full(len(index["instance"]), np.iinfo(np.int64).min, dtype=np.int64)
+        np.maximum.at(last, inst, t)
+        valid = last[inst] - t >= int(future_seconds * TIMESTAMP_UNITS_PER_SECOND)
+        inst, samp, scene = inst[valid], samp[valid], scene[valid]
+
+    # Sample rows are in time order within a scene
+    order = np.lexsort((samp, inst, scene))
+    inst, samp, scene = inst[order], samp[order], scene[order]
+
+    # An instance annotated twice in one sample is one prediction
+    first = np.ones(len(inst), dtype=bool)
+    first[1:] = (inst[1:] != inst[:-1]) | (samp[1:] != samp[:-1])
+    inst, samp, scene = inst[first], samp[first], scene[first]
+
+    bounds = np.flatnonzero(np.diff(scene)) + 1
+    for start, end in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(scene)]))):
+        if start == end:
+            continue
+        tokens = zip(index["instance"][inst[start:end]].tolist(), index["sample"][samp[start:end]].tolist())
+        yield int(scene[start]), [f"{i}_{s}" for i, s in tokens]
+
+
+def annotation_predictions(
+    data_dir: Path,
+    scene_numbers: List[int],
+    future_seconds: Optional[float] = None
+) -> Iterator[Tuple[int, List[str]]]:
+    """Prediction tokens per scene number, from the annotation tables."""
+    index = annotation_index(data_dir / "annotation", timestamps=future_seconds is not None)
+    print(f"Indexed {len(index['ann_sample'])} annotations of {len(index['instance'])} instances")
+
+    # Scenes come out in table order; requested scenes without pairs come last, empty
+    missing = list(scene_numbers)
+    for scene_row, scene_predictions in prediction_pairs(index, future_seconds):
+        scene_num = scene_number(str(index["scene_name"][scene_row]))
+        if scene_num in missing:
+            missing.remove(scene_num)
+            yield scene_num, scene_predictions
+    for scene_num in missing:
+        yield scene_num, []
+
+
+def token_map_predictions(data_dir: Path, scene_numbers: List[int]) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Prediction tokens per scene number from tokens_map.json alone.
+
+    Without the annotation tables it is unknown which instance appears in
+    which sample, so every instance is paired with every sample of its scene.
+    Tokens are read per scene from tokens_map.sqlite when it exists, so
+    only the requested scenes' rows are touched.
+    """
+    index_file = token_index_path(data_dir)
+    if index_file.exists():
+        print(f"Loading token index from: {index_file}")
+        with sqlite3.connect(index_file) as db:
+            for scene_num in scene_numbers:
+                scene_insts = load_scene_tokens(db, "inst", scene_num)
+                scene_samps = load_scene_tokens(db, "sample", scene_num)
+                yield scene_num, [f"{i}_{s}" for i in scene_insts for s in scene_samps]
+        db.close()
+        return
+
+    # Load and separate tokens
+    instances, samples = load_token_map(data_dir)
+
+    # Group tokens by scene number
+    scene_instances = defaultdict(list)
+    scene_samples = defaultdict(list)
+
+    # Group instances by scene
+    for token, mapped in instances.items():
+        try:
+            scene_num = int(token.split('_')[1])
+            scene_instances[scene_num].append(mapped)  # Store just the UUID
+        except (IndexError, ValueError):
+            continue  # Skip malformed tokens
+
+    # Group samples by scene
+    for token, mapped in samples.items():
+        try:
+            scene_num = int(token.split('_')[1])
+            scene_samples[scene_num].append(mapped)  # Store just the UUID
+        except (IndexError, ValueError):
+            continue  # Skip malformed tokens
+
+    for scene_num in scene_numbers:
+        # Format: "instance_uuid_sample_uuid"
+        yield scene_num, [
+            f"{inst_mapped}_{samp_mapped}"
+            for inst_mapped in scene_instances.get(scene_num, [])
+            for samp_mapped in scene_samples.get(scene_num, [])
+        ]
+
+
+def write_json_object_stream(output_file: Path, entries: Iterator[Tuple[str, List[str]]]) -> int:
+    """
+    Write (key, list of strings) entries as one JSON object, entry by entry.
+
+    Each list is written as soon as it is produced, so memory is bounded by
+    the largest single list instead of the whole object. The output is the
+    same as json.dump(dict(entries), f, indent=2).
+
+    Returns:
+        Number of entries written
+    """
+    count = 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write("{")
+        for key, values in entries:
+            f.write(f"{',' if count else ''}\n  {json.dumps(key)}: ")
+            if values:
+                f.write("[")
+                f.write(",".join(f"\n    {json.dumps(value)}" for value in values))
+                f.write("\n  ]")
+            else:
+                f.write("[]")
+            count += 1
+        f.write("\n}" if count else "}")
+    return count
+
+
 def create_predictions(
     data_dir: Path,
     output_dir: Path = None,
-    scene_numbers: List[int] = [1, 2, 3, 4, 5]
+    scene_numbers: List[int] = [1, 2, 3, 4, 5],
+    future_seconds: Optional[float] = None,
+    source: str = "annotations"
 ) -> None:
-    """Create prediction data by matching instance and sample tokens by scene number."""
+    """
+    Create prediction_scenes.json from the annotated (instance, sample) pairs.
+
+    Args:
+        data_dir: Output root holding annotation/
+        output_dir: Where to create predictions/ (default: <data_dir>/map)
+        scene_numbers: Scenes to include
+        future_seconds: Only keep pairs with this many seconds of annotated
+            future (annotation source only)
+        source: "annotations" to pair instances with the samples they are
+            annotated in, "token_map" for the legacy instance x sample product
+    """
     if output_dir is None:
         output_dir = data_dir / "map" / "predictions"
     else:
         output_dir = output_dir / "predictions"
-    
+
     output_dir.mkdir(parents=True, exist_ok=True)
-    
+
     try:
-        # Load and separate tokens
-        instances, samples = load_token_map(data_dir)
-        
-        # Group tokens by scene number
-        scene_instances = defaultdict(list)
-        scene_samples = defaultdict(list)
-        
-        # Group instances by scene
-        for token, mapped in instances.items():
-            try:
-                scene_num = int(token.split('_')[1])
-                scene_instances[scene_num].append(mapped)  # Store just the UUID
-            except (IndexError, ValueError):
-                continue  # Skip malformed tokens
-            
-        # Group samples by scene
-        for token, mapped in samples.items():
-            try:
-                scene_num = int(token.split('_')[1])
-                scene_samples[scene_num].append(mapped)  # Store just the UUID
-            except (IndexError, ValueError):
-                continue  # Skip malformed tokens
-        
-        # Create the predictions dictionary
-        predictions = {}
-        
-        # Process each scene
-        for scene_num in scene_numbers:
-            try:
-                scene_insts = scene_instances.get(scene_num, [])
-                scene_samps = scene_samples.get(scene_num, [])
-                
-                if not scene_insts or not scene_samps:
+        if source == "annotations":
+            scene_lists = annotation_predictions(data_dir, scene_numbers, future_seconds)
+        else:
+            scene_lists = token_map_predictions(data_dir, scene_numbers)
+
+        # Process each scene; only one scene's list is alive at a time
+        def scene_entries():
+            for scene_num, scene_predictions in scene_lists:
+                if not scene_predictions:
                     print(f"⚠ No instances or samples found for scene {scene_num}")
                     continue
-                
-                # Create predictions for this scene
-                scene_predictions = []
-                for inst_mapped in scene_insts:
-                    for samp_mapped in scene_samps:
-                        # Format: "instance_uuid_sample_uuid"
-                        scene_predictions.append(f"{inst_mapped}_{samp_mapped}")
-                
-                # Add to predictions dict with scene name as key
+
+                # Scene name is the key in prediction_scenes.json
                 scene_name = f"scene-{scene_num:04d}"
-                predictions[scene_name] = scene_predictions
-                
                 print(f"✅ Processed scene {scene_name} with {len(scene_predictions)} predictions")
-                
-            except Exception as e:
-                print(f"⚠ Error processing scene {scene_num}: {str(e)}")
-                import traceback
-                traceback.print_exc()
-        
-        # Save all predictions to a single JSON file
+                yield scene_name, scene_predictions
+
+        # Stream all predictions into a single JSON file
         output_file = output_dir / "prediction_scenes.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(predictions, f, indent=2)
+        write_json_object_stream(output_file, scene_entries())
         print(f"✅ Saved predictions to: {output_file}")
-                
+
     except Exception as e:
         print(f"⚠ Error: {str(e)}")
         import traceback
         traceback.print_exc()
 
 if __name__ == "__main__":
-    base_dir = Path(r"C:\Users\mitvi\Downloads\argov2_00000")
+    parser = argparse.ArgumentParser(description="Create prediction_scenes.json")
+
+    parser.add_argument(
+        "--base_dir",
+        type=str,
+        default=r"C:\Users\mitvi\Downloads\argov2_00000",
+        help="Base directory containing output/annotation"
+    )
+
+    parser.add_argument(
+        "--scenes",
+        type=int,
+        nargs="+",
+        default=[1, 2, 3, 4, 5],
+        help="Scene numbers to include"
+    )
+
+    parser.add_argument(
+        "--future_seconds",
+        type=float,
+        default=None,
+        help="Only keep instance/sample pairs with this many seconds of annotated future"
+    )
+
+    parser.add_argument(
+        "--source",
+        choices=["annotations", "token_map"],
+        default="annotations",
+        help="Pair instances with the samples they are annotated in, or all samples (token_map)"
+    )
+
+    args = parser.parse_args()
+
+    base_dir = Path(args.base_dir)
     data_dir = base_dir / "output"  # Where tokens_map.json is located
     output_dir = base_dir / "output" / "map"  # Where to save predictions
-    
+
     print(f"Base directory: {base_dir}")
     print(f"Data directory: {data_dir}")
     print(f"Output directory: {output_dir}")
-    
-    create_predictions(data_dir=data_dir, output_dir=output_dir)s
+
+    create_predictions(
+        data_dir=data_dir,
+        output_dir=output_dir,
+        scene_numbers=args.scenes,
+        future_seconds=args.future_seconds,
+        source=args.source
+    )
@@ -0,0 +1,213 @@
+import struct
+import zlib
+from pathlib import Path
+import numpy as np
+
+
+# Semantic-prior mask referenced by map.json (see annotations/map.py),
+# relative to the nuScenes dataroot
+SEMANTIC_PRIOR_FILENAME = "maps/53992ee3023e5494b90c316c183be829.png"
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+# ---------------------------------------------------------
+# Polygon edges
+# ---------------------------------------------------------
+
+def drivable_area_rings(map_data):
+    """(N, 2) vertex arrays of the merged map's drivable_area polygons."""
+    node_xy = {n["token"]: (n["x"], n["y"]) for n in map_data["node"]}
+    rings = []
+    for area in map_data.get("drivable_area", []):
+        ring = np.array([node_xy[tok] for tok in area["polygon"] if tok in node_xy], dtype=np.float64)
+        if len(ring) >= 3:
+            rings.append(ring)
+    return rings
+
+
+def ring_edges(rings):
+    """
+    Flatten closed rings into one edge table.
+
+    Every edge gets a winding weight of +1/-1 depending on whether it runs up
+    or down, flipped for clockwise rings so that all polygons wind the same
+    way. Summing the weights of the edges left of a pixel then counts the
+    polygons covering it: overlapping polygons add up instead of cancelling
+    as they would under a plain even-odd rule.
+
+    Returns:
+        (ax, ay, bx, by, weight) arrays, one entry per edge
+    """
+    if not rings:
+        empty = np.zeros(0)
+        return empty, empty, empty, empty, np.zeros(0, dtype=np.int64)
+
+    a = np.concatenate(rings)
+    b = np.concatenate([np.roll(ring, -1, axis=0) for ring in rings])
+
+    # Shoelace orientation of each ring, broadcast to its edges
+    sizes = [len(ring) for ring in rings]
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    area2 = np.add.reduceat(a[:, 0] * b[:, 1] - b[:, 0] * a[:, 1], starts)
+    orientation = np.repeat(np.where(area2 < 0, -1, 1), sizes)
+
+    weight = np.where(b[:, 1] > a[:, 1], 1, -1) * orientation
+    return a[:, 0], a[:, 1], b[:, 0], b[:, 1], weight.astype(np.int64)
+
+
+# ---------------------------------------------------------
+# Rasterization
+# ---------------------------------------------------------
+
+def fill_rows(edges, row_start, row_end, width, height, resolution):
+    """
+    Scanline-fill a band of mask rows.
+
+    Pixel centres sit at ((col + 0.5) * res, (height - row - 0.5) * res), so
+    row 0 is the top of the image as in the nuScenes MapMask. Each edge is
+    expanded to the rows whose centre line it crosses (half-open in y so
+    shared vertices count once), the crossing x is turned into the first
+    pixel column right of it, and the winding weights are scattered into an
+    int32 accumulator and integrated along each row with an in-place cumsum.
+
+    Returns:
+        (row_end - row_start, width) bool array, True where drivable
+    """
+    ax, ay, bx, by, weight = edges
+    rows = row_end - row_start
+
+    lo = np.minimum(ay, by)
+    hi = np.maximum(ay, by)
+    top = height * resolution
+
+    # Rows r with lo <= centre_y(r) < hi, clipped to the band
+    first = np.floor((top - hi) / resolution - 0.5).astype(np.int64) + 1
+    last = np.floor((top - lo) / resolution - 0.5).astype(np.int64)
+    first = np.maximum(first, row_start)
+    last = np.minimum(last, row_end - 1)
+    counts = np.maximum(last - first + 1, 0)
+
+    live = np.flatnonzero(counts)
+    if len(live) == 0:
+        return np.zeros((rows, width), dtype=bool)
+
+    counts = counts[live]
+    edge = np.repeat(live, counts)
+    row = np.repeat(first[live], counts) + (
+        np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    )
+
+    y = top - (row + 0.5) * resolution
+    x = ax[edge] + (y - ay[edge]) * (bx[edge] - ax[edge]) / (by[edge] - ay[edge])
+    col = np.clip(np.floor(x / resolution - 0.5).astype(np.int64) + 1, 0, width)
+
+    flat = (row - row_start) * (width + 1) + col
+    winding = np.zeros((rows, width + 1), dtype=np.int32)
+    np.add.at(winding.reshape(-1), flat, weight[edge].astype(np.int32))
+    np.cumsum(winding, axis=1, out=winding)
+    return winding[:, :width] != 0
+
+
+def iter_mask_bands(rings, width, height, resolution, band_rows=256):
+    """
+    Yield the mask top to bottom in bands of at most band_rows rows.
+
+    Ring coordinates are relative to the mask's bottom-left corner.
+
+    Only edges whose y extent overlaps a band take part in filling it, so
+    neither the full canvas nor the full edge/row expansion is ever held in
+    memory.
+    """
+    edges = ring_edges(rings)
+    ay, by = edges[1], edges[3]
+    top = height * resolution
+
+    for row_start in range(0, height, band_rows):
+        row_end = min(row_start + band_rows, height)
+        band_hi = top - row_start * resolution
+        band_lo = top - row_end * resolution
+        keep = (np.maximum(ay, by) >= band_lo) & (np.minimum(ay, by) <= band_hi)
+        band_edges = tuple(column[keep] for column in edges)
+        yield fill_rows(band_edges, row_start, row_end, width, height, resolution)
+
+
+# ---------------------------------------------------------
+# PNG output
+# ---------------------------------------------------------
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def write_mask_png(path, bands, width, height, text=None):
+    """
+    Stream an 8-bit grayscale PNG (0 = background, 255 = drivable).
+
+    Bands are compressed as they arrive and flushed as IDAT chunks, so the
+    encoded image never has to exist uncompressed in one piece. `text` is
+    written as tEXt chunks (keyword -> value).
+    """
+    compressor = zlib.compressobj(6)
+    with open(path, "wb") as f:
+        f.write(PNG_SIGNATURE)
+        f.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)))
+        for keyword, value in (text or {}).items():
+            f.write(png_chunk(b"tEXt", keyword.encode("latin-1") + b"\0" + value.encode("latin-1")))
+
+        for band in bands:
+            # Filter type 0 (None) byte in front of every scanline
+            scanlines = np.zeros((band.shape[0], width + 1), dtype=np.uint8)
+            scanlines[:, 1:] = band * np.uint8(255)
+            data = compressor.compress(scanlines.tobytes())
+            if data:
+                f.write(png_chunk(b"IDAT", data))
+
+        f.write(png_chunk(b"IDAT", compressor.flush()))
+        f.write(png_chunk(b"IEND", b""))
+
+
+def rasterize_drivable_area(map_data, png_path, resolution=0.1, pixel_budget=1 << 22):
+    """
+    Rasterize the merged drivable areas into the semantic-prior mask.
+
+    The mask follows the nuScenes MapMask convention, with row 0 at the top
+    and every pixel covering `resolution` metres, but its bottom-left corner
+    is the drivable areas' lower bound snapped to the pixel grid instead of
+    map coordinate (0, 0). That origin is stored in the PNG as "map_origin"
+    and "resolution" tEXt chunks.
+
+    Args:
+        map_data: Merged map dictionary (node and drivable_area)
+        png_path: PNG to write
+        resolution: Metres per pixel
+        pixel_budget: Approximate number of pixels filled per band; bands
+            get max(1, pixel_budget // (width + 1)) rows
+
+    Returns:
+        (canvas_edge, origin): the mask's (width, height) in metres and the
+        map coordinate of its bottom-left corner
+    """
+    rings = drivable_area_rings(map_data)
+    if rings:
+        points = np.concatenate(rings)
+        origin = np.floor(points.min(axis=0) / resolution) * resolution
+        extent = points.max(axis=0) - origin
+        rings = [ring - origin for ring in rings]
+    else:
+        origin = extent = np.zeros(2)
+
+    width, height = np.maximum(np.ceil(extent / resolution).astype(np.int64), 1).tolist()
+    band_rows = max(1, pixel_budget // (width + 1))
+
+    png_path = Path(png_path)
+    png_path.parent.mkdir(parents=True, exist_ok=True)
+    text = {"map_origin": " ".join(repr(float(v)) for v in origin), "resolution": repr(float(resolution))}
+    write_mask_png(png_path, iter_mask_bands(rings, width, height, resolution, band_rows), width, height, text)
+
+    return [width * resolution, height * resolution], origin.tolist()
+
+
+def semantic_prior_path(dataroot):
+    """Where map.json expects the semantic-prior PNG under a nuScenes dataroot."""
+    return Path(dataroot) / SEMANTIC_PRIOR_FILENAME
@@ -0,0 +1,103 @@
+import numpy as np
+
+# shapely is only needed for the drivable-area union, so it is imported lazily
+
+
+def _import_shapely():
+    try:
+        import shapely
+    except ImportError as e:
+        raise ImportError("Drivable-area union requires shapely>=2.0 (pip install shapely)") from e
+    return shapely
+
+
+def connected_components(n, first, second):
+    """
+    Label the connected components of an undirected graph given as pairs.
+
+    Vectorized union-find: every pass hooks the larger label of each pair
+    onto the smaller one with np.minimum.at, then compresses the label
+    pointers, until nothing changes.
+
+    Returns:
+        (n,) int64 component ids numbered 0..k-1
+    """
+    labels = np.arange(n, dtype=np.int64)
+    while True:
+        previous = labels
+        low = np.minimum(labels[first], labels[second])
+        labels = labels.copy()
+        np.minimum.at(labels, previous[first], low)
+        np.minimum.at(labels, previous[second], low)
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            break
+    return np.unique(labels, return_inverse=True)[1].reshape(-1)
+
+
+def merge_overlapping_rings(rings):
+    """
+    Union overlapping polygons into a minimal set.
+
+    Intersecting pairs come from one bulk STRtree query; the pairs are
+    grouped into connected components and each component with more than one
+    member is replaced by the exterior rings of its union. drivable_area
+    records only hold an outline, so a component whose union encloses holes
+    (e.g. roads around a block) keeps its original polygons; replacing them
+    by the exterior would make the enclosed area drivable.
+
+    Args:
+        rings: (K, 3) vertex arrays of the polygons
+
+    Returns:
+        List of (member indices, rings) per component, where rings is None
+        when the members' original records are kept (a polygon that overlaps
+        nothing, or a union with holes) and a list of (K, 3) exterior rings
+        otherwise
+    """
+    shapely = _import_shapely()
+
+    polygons = shapely.make_valid(np.array([
+        shapely.Polygon(ring) if len(ring) >= 3 else shapely.Polygon() for ring in rings
+    ], dtype=object))
+
+    tree = shapely.STRtree(polygons)
+    first, second = tree.query(polygons, predicate="intersects")
+    pairs = first < second
+    labels = connected_components(len(polygons), first[pairs], second[pairs])
+
+    order = np.argsort(labels, kind="stable")
+    groups = np.split(order, np.flatnonzero(np.diff(labels[order])) + 1) if len(order) else []
+
+    kept_holes = 0
+    components = []
+    for members in groups:
+        members = members.tolist()
+        if len(members) == 1:
+            components.append((members, None))
+            continue
+
+        union = shapely.union_all(polygons[members])
+        parts = [
+            part for part in getattr(union, "geoms", [union])
+            if part.geom_type == "Polygon" and not part.is_empty
+        ]
+        if any(len(part.interiors) for part in parts):
+            kept_holes += 1
+            components.append((members, None))
+            continue
+
+        # Vertices created by the overlay have no z; give them the members' mean height
+        z_fill = float(np.mean([rings[i][:, 2].mean() for i in members]))
+        merged = []
+        for part in parts:
+            coords = np.array(part.exterior.coords, dtype=np.float64)[:-1]
+            if coords.shape[1] == 2:
+                coords = np.column_stack([coords, np.full(len(coords), z_fill)])
+            coords[np.isnan(coords[:, 2]), 2] = z_fill
+            merged.append(coords)
+        components.append((members, merged))
+
+    if kept_holes:
+        print(f"⚠ {kept_holes} drivable-area unions enclose holes; kept their original polygons")
+    return components
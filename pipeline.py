@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional
+
+# Runs the four converters as one DAG:
+#   annotations ──► predictions
+#   can                              (independent)
+#   map                              (independent)
+# Every stage is its script's own CLI, run in the script's folder so its bare
+# imports resolve. A stage is skipped when the hash of its code, inputs and
+# command matches the last successful run and its outputs still exist.
+REPO = Path(__file__).resolve().parent
+STATE_NAME = ".pipeline_state.json"
+
+
+def pipeline_stages(base_dir: Path, scenes: List[int]) -> Dict[str, Dict[str, Any]]:
+    """
+    Declare the stages for one data folder.
+
+    Args:
+        base_dir: Folder containing canbus_temp and argov2_00000 (the
+            default layout of every script); outputs go to <base_dir>/output
+        scenes: Scene numbers to convert
+
+    Returns:
+        Stage name -> spec with the script folder ("dir"), command line
+        ("args"), upstream stages ("deps"), code files ("code"), input files
+        ("inputs") and files that must exist after a run ("outputs")
+    """
+    data_dir = base_dir / "argov2_00000"
+    output_root = base_dir / "output"
+    scene_dirs = [data_dir / f"argov2_{n}" for n in scenes]
+    scene_args = [str(n) for n in scenes]
+
+    return {
+        "annotations": {
+            "dir": REPO / "annotations",
+            "args": [
+                "main.py", "--output_root", str(output_root),
+                "--base_data_dir", str(data_dir), "--scenes", *scene_args
+            ],
+            "deps": [],
+            "code": ["annotations/*.py", "common/*.py"],
+            "inputs": [
+                path for d in scene_dirs for path in (
+                    d / "new_egopose_vehicle.json",
+                    d / "new_annotations.json",
+                    d / "pcd_bin_files.csv",
+                    d / "calibration" / "intrinsics.json",
+                    d / "calibration" / "egovehicle_SE3_sensor.json"
+                )
+            ],
+            "outputs": [output_root / "annotation" / "tokens_map.json", output_root / "annotation" / "sample_annotation.json"]
+        },
+        "can": {
+            "dir": REPO / "can_code",
+            "args": ["can_expension.py", "--base_dir", str(base_dir), "--scenes", *scene_args],
+            "deps": [],
+            "code": ["can_code/*.py", "common/*.py"],
+            "inputs": [
+                *sorted((base_dir / "canbus_temp").glob("scene-0001_*.json")),
+                *(d / "pcd_bin_files.csv" for d in scene_dirs)
+            ],
+            "outputs": [output_root / "canbus" / f"scene-{n:04d}_meta.json" for n in scenes]
+        },
+        "map": {
+            "dir": REPO / "map_code",
+            "args": [
+                "map_extension.py", "--base_folder", str(data_dir),
+                "--output", str(output_root / "map" / "merged_nuscenes_map.json"), "--scenes", *scene_args
+            ],
+            "deps": [],
+            "code": ["map_code/*.py"],
+            "inputs": [data_dir / f"argov2_{n}" / "map" / f"map_log_scene{n}.json" for n in scenes],
+            "outputs": [output_root / "map" / "merged_nuscenes_map.json"]
+        },
+        "predictions": {
+            "dir": REPO / "map_code",
+            "args": ["map_prediction.py", "--base_dir", str(base_dir), "--scenes", *scene_args],
+            "deps": ["annotations"],
+            "code": ["map_code/map_prediction.py"],
+            "inputs": [
+                output_root / "annotation" / name
+                for name in ("tokens_map.json", "tokens_map.sqlite", "scene.json", "sample.json",
+                             "instance.json", "sample_annotation.json", "index/index.json")
+            ],
+            "outputs": [output_root / "map" / "predictions" / "prediction_scenes.json"]
+        }
+    }
+
+
+# ---------------------------------------------------------
+# Change detection
+# ---------------------------------------------------------
+
+def stage_fingerprint(stage: Dict[str, Any]) -> str:
+    """
+    Hash what a stage's result depends on.
+
+    Code is hashed by content; data inputs, which can be large, by path,
+    size and modification time. Missing inputs are part of the hash too, so
+    a file appearing later triggers a rerun.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(stage["args"]).encode())
+
+    for pattern in stage["code"]:
+        for path in sorted(REPO.glob(pattern)):
+            digest.update(str(path.relative_to(REPO)).encode())
+            digest.update(path.read_bytes())
+
+    for path in stage["inputs"]:
+        path = Path(path)
+        if path.exists():
+            stat = path.stat()
+            digest.update(f"{path}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+        else:
+            digest.update(f"{path}|missing".encode())
+
+    return digest.hexdigest()
+
+
+def load_state(state_path: Path) -> Dict[str, Any]:
+    if state_path.exists():
+        with open(state_path, "r") as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state_path: Path, state: Dict[str, Any]):
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = state_path.with_name(f"{state_path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, state_path)
+
+
+def is_up_to_date(stage: Dict[str, Any], fingerprint: str, previous: Optional[Dict[str, Any]]) -> bool:
+    return (
+        previous is not None
+        and previous.get("fingerprint") == fingerprint
+        and all(Path(path).exists() for path in stage["outputs"])
+    )
+
+
+# ---------------------------------------------------------
+# Execution
+# ---------------------------------------------------------
+
+def run_stage(name: str, stage: Dict[str, Any], log_dir: Path) -> int:
+    """Run one stage's script, sending its output to <log_dir>/<name>.log."""
+    log_dir.mkdir(parents=True, exist_ok=True)
+    with open(log_dir / f"{name}.log", "w", encoding="utf-8") as log:
+        result = subprocess.run(
+            [sys.executable, *stage["args"]],
+            cwd=stage["dir"],
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            env={**os.environ, "PYTHONIOENCODING": "utf-8"}
+        )
+    return result.returncode
+
+
+def run_pipeline(
+    stages: Dict[str, Dict[str, Any]],
+    state_path: Path,
+    workers: Optional[int] = None,
+    force: bool = False,
+    selected: Optional[List[str]] = None
+) -> Dict[str, str]:
+    """
+    Run the stage DAG.
+
+    A stage starts as soon as all of its dependencies have finished, so
+    independent stages run concurrently. Its fingerprint is taken at that
+    point, after upstream stages have rewritten its inputs; an unchanged
+    stage with existing outputs is skipped. Dependents of a failed stage
+    are not run.
+
+    Args:
+        stages: Output of pipeline_stages
+        state_path: JSON file with the fingerprint of every successful run
+        workers: Maximum number of stages running at once (default: all)
+        force: Run stages even if they are up to date
+        selected: Only run these stages; the others are treated as done
+
+    Returns:
+        Stage name -> "ran", "skipped", "failed" or "blocked"
+    """
+    state = load_state(state_path)
+    log_dir = state_path.parent / "logs"
+
+    status = {name: "skipped" for name in stages if selected and name not in selected}
+    pending = [name for name in stages if name not in status]
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=workers or len(stages)) as pool:
+        while pending or running:
+            started = len(pending)
+            for name in list(pending):
+                deps = [status.get(dep) for dep in stages[name]["deps"]]
+                if any(dep in ("failed", "blocked") for dep in deps):
+                    print(f"⚠ {name}: not run, an upstream stage failed")
+                    status[name] = "blocked"
+                    pending.remove(name)
+                    continue
+                if any(dep is None for dep in deps):
+                    continue
+
+                pending.remove(name)
+                fingerprint = stage_fingerprint(stages[name])
+                if not force and is_up_to_date(stages[name], fingerprint, state.get(name)):
+                    print(f"⏭ {name}: unchanged, skipping")
+                    status[name] = "skipped"
+                    continue
+
+                print(f"▶ {name}: running")
+                running[pool.submit(run_stage, name, stages[name], log_dir)] = (name, fingerprint, time.time())
+
+            if not running:
+                if pending and len(pending) == started:
+                    raise ValueError(f"Stages {pending} have unknown or circular dependencies")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, fingerprint, start = running.pop(future)
+                returncode = future.result()
+                if returncode == 0:
+                    print(f"✅ {name}: done in {time.time() - start:.1f}s")
+                    status[name] = "ran"
+                    state[name] = {"fingerprint": fingerprint, "finished": time.time()}
+                    save_state(state_path, state)
+                else:
+                    print(f"⚠ {name}: failed with exit code {returncode}, see {log_dir / f'{name}.log'}")
+                    status[name] = "failed"
+
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the annotation, CAN, map and prediction converters as one pipeline")
+    parser.add_argument(
+        "--base_dir",
+        type=str,
+        default=r"C:\Users\mitvi\Downloads\argov2_00000",
+        help="Folder containing canbus_temp and argov2_00000; outputs go to <base_dir>/output"
+    )
+    parser.add_argument("--scenes", type=int, nargs="+", default=[1, 2, 3, 4, 5], help="Scene numbers to convert")
+    parser.add_argument("--stages", nargs="+", default=None, help="Only run these stages")
+    parser.add_argument("--workers", type=int, default=None, help="Maximum number of stages running at once")
+    parser.add_argument("--force", action="store_true", help="Rerun stages even if nothing changed")
+    args = parser.parse_args()
+
+    base_dir = Path(args.base_dir)
+    stages = pipeline_stages(base_dir, args.scenes)
+    unknown = [name for name in args.stages or [] if name not in stages]
+    if unknown:
+        parser.error(f"Unknown stages {unknown}; choose from {list(stages)}")
+
+    status = run_pipeline(stages, base_dir / "output" / STATE_NAME, args.workers, args.force, args.stages)
+    if any(result in ("failed", "blocked") for result in status.values()):
+        sys.exit(1)
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# The converters are run as scripts from their own folders and import their
+# neighbours by bare name; make those folders importable the same way
+REPO = Path(__file__).resolve().parent.parent
+for folder in ("annotations", "can_code", "map_code", "common"):
+    sys.path.insert(0, str(REPO / folder))
@@ -0,0 +1,91 @@
+import json
+import shutil
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from token_manager import TokenManager
+from scene import generate_scene_json
+from ego_pose import generate_ego_pose_json
+from sample import generate_sample_json
+from sample_data import generate_sample_data_json
+from instance import generate_instance_json
+from sample_annotation import generate_sample_annotation_json
+from main import write_tables
+from map_prediction import create_predictions
+
+SCENES = [1, 2]
+FRAMES = 4
+
+
+def scene_info(tokens, scene):
+    """A process_scene result with two tracks, one leaving after the first frame."""
+    poses = [
+        {"timestamp_ns": i * 500_000_000, "tx_m": i, "ty_m": 0.0, "tz_m": 0.0, "qx": 0.0, "qy": 0.0, "qz": 0.0, "qw": 1.0}
+        for i in range(FRAMES)
+    ]
+    box = {"tx_m": 1.0, "ty_m": 2.0, "tz_m": 0.0, "length_m": 4.0, "width_m": 2.0, "height_m": 1.5,
+           "qx": 0.0, "qy": 0.0, "qz": 0.0, "qw": 1.0, "category": "REGULAR_VEHICLE"}
+    anns = [{**box, "track_uuid": "car", "frame_idx": i} for i in range(FRAMES)]
+    anns.append({**box, "track_uuid": "bike", "frame_idx": 0})
+    return {
+        "scene_number": scene,
+        "num_frames": FRAMES,
+        "data_dir": "",
+        "sensor_intrinsics": [],
+        "sensor_extrinsics": [],
+        "scene_data": {
+            "scene": generate_scene_json(None, FRAMES, tokens, scene),
+            "ego_pose": generate_ego_pose_json(None, poses, tokens, scene),
+            "sample": generate_sample_json(None, poses, tokens, scene),
+            "sample_data": generate_sample_data_json(None, poses, tokens, scene),
+            "instance": generate_instance_json(None, anns, tokens, scene),
+            "sample_annotation": generate_sample_annotation_json(None, anns, tokens, scene)
+        }
+    }
+
+
+@pytest.fixture(scope="module")
+def outputs(tmp_path_factory):
+    """The same conversion written monolithic and sharded: layout -> output root."""
+    tokens = TokenManager()
+    scenes = [scene_info(tokens, scene) for scene in SCENES]
+    roots = {}
+    for layout in ("monolithic", "sharded"):
+        root = tmp_path_factory.mktemp(layout)
+        (root / "annotation").mkdir()
+        write_tables(root / "annotation", tokens, scenes, layout)
+        roots[layout] = root
+    return roots
+
+
+def predictions(root, future_seconds=None):
+    create_predictions(root, scene_numbers=SCENES, future_seconds=future_seconds)
+    with open(root / "map" / "predictions" / "prediction_scenes.json") as f:
+        return json.load(f)
+
+
+def test_sharded_output_has_no_monolithic_frame_tables(outputs):
+    annotation = outputs["sharded"] / "annotation"
+    assert (annotation / "manifest.json").exists()
+    assert not (annotation / "sample.json").exists()
+    assert not (annotation / "sample_annotation.json").exists()
+
+
+@pytest.mark.parametrize("future_seconds", [None, 1.0])
+def test_sharded_predictions_match_monolithic(outputs, future_seconds):
+    expected = predictions(outputs["monolithic"], future_seconds)
+    assert sorted(expected) == ["scene-0001", "scene-0002"]
+    assert predictions(outputs["sharded"], future_seconds) == expected
+
+
+def test_sharded_predictions_without_index_sidecar(outputs, tmp_path):
+    root = tmp_path / "sharded"
+    shutil.copytree(outputs["sharded"], root)
+    shutil.rmtree(root / "annotation" / "index")
+
+    result = predictions(root)
+    # car is annotated in every frame, bike only in the first
+    assert [len(result[scene]) for scene in ("scene-0001", "scene-0002")] == [FRAMES + 1, FRAMES + 1]
+    assert result == predictions(outputs["monolithic"])
@@ -0,0 +1,54 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("shapely")
+
+from map_union import merge_overlapping_rings
+from map_extension import NodeIndex, union_drivable_areas
+from map_index import point_ring_distance
+
+
+def box(xmin, ymin, xmax, ymax, z=0.0):
+    return np.array([[xmin, ymin, z], [xmax, ymin, z], [xmax, ymax, z], [xmin, ymax, z]], dtype=np.float64)
+
+
+def ring_road():
+    """Four 10 m road strips around a 100 x 100 block."""
+    return [
+        box(-10, -10, 110, 0),
+        box(-10, 100, 110, 110),
+        box(-10, -10, 0, 110),
+        box(100, -10, 110, 110)
+    ]
+
+
+def test_overlapping_areas_are_replaced_by_their_union():
+    components = merge_overlapping_rings([box(0, 0, 10, 10), box(5, 0, 15, 10), box(50, 50, 60, 60)])
+
+    merged = {tuple(members): rings for members, rings in components}
+    assert merged[(2,)] is None
+    assert len(merged[(0, 1)]) == 1
+    ring = merged[(0, 1)][0]
+    assert ring[:, 0].min() == 0 and ring[:, 0].max() == 15
+
+
+def test_ring_road_keeps_its_members():
+    components = merge_overlapping_rings(ring_road())
+
+    assert components == [([0, 1, 2, 3], None)]
+
+
+def test_ring_road_block_stays_undrivable():
+    nodes = NodeIndex(0.01)
+    areas = [
+        {"token": f"area{i}", "polygon": [nodes.add(x, y, z) for x, y, z in ring.tolist()]}
+        for i, ring in enumerate(ring_road())
+    ]
+
+    merged = union_drivable_areas(areas, nodes)
+
+    assert [area["token"] for area in merged] == ["area0", "area1", "area2", "area3"]
+    row = {tok: i for i, tok in enumerate(nodes.tokens)}
+    for area in merged:
+        ring = nodes.xyz[[row[tok] for tok in area["polygon"]], :2]
+        assert point_ring_distance(ring, 50.0, 50.0) > 0
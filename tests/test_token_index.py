@@ -0,0 +1,97 @@
+import sqlite3
+
+from token_manager import SENSOR_CHANNELS, TokenManager, token_kind_scene
+from attribute import generate_attribute_json
+from category import generate_category_json
+from sensor import generate_sensor_json
+from calibrated_sensor import generate_calibrated_sensor_json
+from log import generate_log_json
+from map import generate_map_json
+from scene import generate_scene_json
+from ego_pose import generate_ego_pose_json
+from sample import generate_sample_json
+from sample_data import generate_sample_data_json
+from instance import generate_instance_json
+from sample_annotation import generate_sample_annotation_json
+
+SCENES = [1, 2, 3]
+FRAMES = 3
+
+
+def ego_poses():
+    return [
+        {"timestamp_ns": 1000 * i, "tx_m": i, "ty_m": 0.0, "tz_m": 0.0, "qx": 0.0, "qy": 0.0, "qz": 0.0, "qw": 1.0}
+        for i in range(FRAMES)
+    ]
+
+
+def annotations():
+    box = {"tx_m": 1.0, "ty_m": 2.0, "tz_m": 0.0, "length_m": 4.0, "width_m": 2.0, "height_m": 1.5,
+           "qx": 0.0, "qy": 0.0, "qz": 0.0, "qw": 1.0, "category": "REGULAR_VEHICLE"}
+    return [
+        {**box, "track_uuid": "track-a", "frame_idx": 0},
+        {**box, "track_uuid": "track-a", "frame_idx": 1},
+        {**box, "frame_idx": 2}
+    ]
+
+
+def convert(tokens):
+    """Create tokens the way main.py does; returns token name -> scene it was created for."""
+    created = {}
+
+    def record(scene):
+        for name in tokens.tokens:
+            created.setdefault(name, scene)
+
+    generate_attribute_json(None, tokens, return_data=True)
+    generate_category_json(None, tokens, return_data=True)
+    generate_sensor_json(None, tokens, return_data=True)
+    intrinsics = [
+        {"sensor_name": name, "fx_px": 1.0, "fy_px": 1.0, "cx_px": 0.0, "cy_px": 0.0}
+        for name in sorted(SENSOR_CHANNELS)
+    ]
+    generate_calibrated_sensor_json(None, tokens, intrinsics, [], return_data=True)
+    generate_log_json(None, tokens, return_data=True)
+    generate_map_json(None, tokens, return_data=True)
+    record(None)
+
+    for scene in SCENES:
+        poses, anns = ego_poses(), annotations()
+        generate_scene_json(None, FRAMES, tokens, scene)
+        generate_ego_pose_json(None, poses, tokens, scene)
+        generate_sample_json(None, poses, tokens, scene)
+        generate_sample_data_json(None, poses, tokens, scene)
+        generate_instance_json(None, anns, tokens, scene)
+        generate_sample_annotation_json(None, anns, tokens, scene)
+        record(scene)
+    return created
+
+
+def test_every_kind_is_indexed_under_its_own_scene(tmp_path):
+    tokens = TokenManager()
+    created = convert(tokens)
+    tokens.save_index(tmp_path / "tokens_map.sqlite")
+
+    per_scene_kinds = {"scene", "sample", "ego_pose", "sd", "inst", "ann"}
+    assert {token_kind_scene(name)[0] for name, scene in created.items() if scene} == per_scene_kinds
+
+    with sqlite3.connect(tmp_path / "tokens_map.sqlite") as db:
+        for kind in per_scene_kinds:
+            for scene in SCENES:
+                rows = db.execute("SELECT name FROM tokens WHERE kind = ? AND scene = ?", (kind, scene)).fetchall()
+                expected = {name for name, s in created.items() if s == scene and token_kind_scene(name)[0] == kind}
+                assert {name for (name,) in rows} == expected
+                assert expected, f"no {kind} tokens for scene {scene}"
+
+        static = db.execute("SELECT name, kind FROM tokens WHERE scene IS NULL").fetchall()
+    db.close()
+
+    assert {name for name, _ in static} == {name for name, scene in created.items() if scene is None}
+    assert {kind for _, kind in static} == {"attr", "cat", "sensor", "calib", "log", "map"}
+
+
+def test_sample_data_scene_offset():
+    assert token_kind_scene("sd_ring_front_left_0_2") == ("sd", 1)
+    assert token_kind_scene("sd_lidar_4_0") == ("sd", 5)
+    assert token_kind_scene("stereo_front_right") == ("sensor", None)
+    assert token_kind_scene("calib_ring_side_left") == ("calib", None)
@@ -0,0 +1,57 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from work_queue import claim_next, init_queue, read_json, recover_stale_claims
+
+
+def age(path, seconds):
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+def interrupted_release(queue_dir):
+    """Claim scene 3 and stop like a worker that died right after hiding its claim."""
+    claimed = claim_next(queue_dir)
+    private = claimed.with_name(f".{claimed.name}.release")
+    os.rename(claimed, private)
+    return private
+
+
+def test_stale_claims_count_as_attempts(tmp_path):
+    init_queue(tmp_path, [3], "data")
+    for attempt in (1, 2, 3):
+        claimed = claim_next(tmp_path)
+        age(claimed, 120)
+        assert recover_stale_claims(tmp_path, stale_after=60, max_attempts=3) == 1
+
+    assert read_json(tmp_path / "failed" / "scene_0003.json")["attempts"] == 3
+    assert not any((tmp_path / "todo").iterdir())
+
+
+def test_interrupted_release_is_swept_back_to_todo(tmp_path):
+    init_queue(tmp_path, [3], "data")
+    private = interrupted_release(tmp_path)
+
+    # A release that may still be in progress is left alone
+    assert recover_stale_claims(tmp_path, stale_after=60) == 0
+    assert private.exists()
+
+    age(private, 120)
+    assert recover_stale_claims(tmp_path, stale_after=60) == 1
+    assert not private.exists()
+    assert read_json(tmp_path / "todo" / "scene_0003.json")["scene"] == 3
+    assert claim_next(tmp_path) is not None
+
+
+def test_interrupted_release_past_max_attempts_goes_to_failed(tmp_path):
+    init_queue(tmp_path, [3], "data")
+    (tmp_path / "todo" / "scene_0003.json").write_text('{"scene": 3, "attempts": 3}')
+    private = interrupted_release(tmp_path)
+    age(private, 120)
+
+    assert recover_stale_claims(tmp_path, stale_after=60, max_attempts=3) == 1
+    assert (tmp_path / "failed" / "scene_0003.json").exists()